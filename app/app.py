@@ -3,18 +3,21 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-import atexit
-import shutil
-from pathlib import Path
+import os
 
 ROOT = Path(__file__).resolve().parents[1]  # .../DataAssist
 sys.path.insert(0, str(ROOT))
 
 import streamlit as st
-from core.loader import load_dataframe
+from core.loader import load_dataframe, ExcelWorkbook
+from core.dataset_cache import DatasetCache
+from core.compactor import compact_dataframe
+from core.columnar import is_columnar, load_columnar
+import app.components.artifacts  # noqa: F401  (registers the exit cleanup)
 
 APP_TITLE = "DataAssist"
 APP_ICON = "📊"
+DATASET_CACHE = DatasetCache()
 
 
 def init_session_state() -> None:
@@ -26,6 +29,7 @@ def init_session_state() -> None:
         "insights": None,      # cached LLM insights
         "report_md": None,     # cached report markdown
         "charts": [],          # list of saved chart paths (optional)
+        "compute_workers": 1,  # process pool size for core analytics
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -34,9 +38,25 @@ def init_session_state() -> None:
 
 def reset_workspace() -> None:
     """Hard reset current workspace (keeps app running)."""
-    for k in ["df", "meta", "profile", "insights", "report_md", "charts"]:
+    for k in ["df", "meta", "profile", "insights", "report_md", "charts", "result_cache", "cube"]:
         if k in st.session_state:
             st.session_state[k] = None if k != "charts" else []
+    workbook = st.session_state.pop("_workbook", None)
+    if workbook is not None:
+        workbook.close()
+    st.session_state.pop("_workbook_id", None)
+
+
+def get_workbook(file) -> ExcelWorkbook:
+    """Open an Excel upload once per session; sheets loaded from it stay cached."""
+    file_id = getattr(file, "file_id", None) or (file.name, file.size)
+    if st.session_state.get("_workbook_id") != file_id:
+        old = st.session_state.get("_workbook")
+        if old is not None:
+            old.close()
+        st.session_state["_workbook"] = ExcelWorkbook(file)
+        st.session_state["_workbook_id"] = file_id
+    return st.session_state["_workbook"]
 
 
 def render_sidebar() -> None:
@@ -60,8 +80,29 @@ def render_sidebar() -> None:
 
             if meta.get("file_type"):
                 st.write(f"- Type: `{meta['file_type']}`")
+            if meta.get("mode"):
+                st.write(f"- Mode: `{meta['mode']}`")
             if meta.get("sheet"):
                 st.write(f"- Sheet: `{meta['sheet']}`")
+            if meta.get("load_seconds") is not None:
+                cache_note = f" (cache {meta['cache']})" if meta.get("cache") else ""
+                st.write(f"- Load time: **{meta['load_seconds']:.2f}s**{cache_note}")
+
+            cache = st.session_state.get("result_cache")
+            if cache is not None:
+                s = cache.stats()
+                st.write(f"- Result cache: **{s['hits']}** hits / **{s['misses']}** misses")
+
+            comp = meta.get("compaction")
+            if comp:
+                mb_before = comp["bytes_before"] / 1024 ** 2
+                mb_after = comp["bytes_after"] / 1024 ** 2
+                st.write(f"- Memory: **{mb_before:,.1f} → {mb_after:,.1f} MB** (-{comp['saved_pct']*100:.0f}%)")
+                with st.expander("Memory by column"):
+                    st.dataframe(
+                        [{"column": c, **info} for c, info in comp["columns"].items()],
+                        use_container_width=True,
+                    )
 
         st.divider()
 
@@ -121,14 +162,77 @@ def main() -> None:
     st.subheader("📤 Upload dataset")
 
     file = st.file_uploader("Upload CSV/XLSX", type=["csv", "xlsx", "xls"])
+    mode = st.radio(
+        "Dataset mode",
+        ["In memory", "Out-of-core"],
+        horizontal=True,
+        help="Out-of-core keeps the data in a memory-mapped file on disk and loads only the columns each step needs.",
+    )
+    parse_workers = st.number_input(
+        "CSV parse workers",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        value=1,
+        help="Parse large CSVs on several cores (in-memory mode).",
+    )
+    st.number_input(
+        "Analysis workers",
+        min_value=1,
+        max_value=os.cpu_count() or 1,
+        key="compute_workers",
+        help="Profile, outlier and correlation work on in-memory data runs on this many processes.",
+    )
+    compact = st.checkbox(
+        "Compact memory after load",
+        value=False,
+        help="Store low-cardinality text as category and shrink integer columns. Statistics are unchanged.",
+    )
 
     if file is not None:
+        workbook = None
+        sheet_name = None
+        if file.name.lower().endswith((".xlsx", ".xls")):
+            try:
+                workbook = get_workbook(file)
+            except Exception as e:
+                st.error(f"Failed to open workbook: {e}")
+                return
+            dims = workbook.dimensions()
+
+            def sheet_label(name: str) -> str:
+                d = dims.get(name, {})
+                if d.get("rows") is None:
+                    return name
+                return f"{name} ({d['rows']:,} × {d['cols']:,})"
+
+            sheet_name = st.selectbox("Sheet", workbook.sheet_names, format_func=sheet_label)
+
+        bar = st.progress(0.0, text="Reading file...")
+        on_progress = lambda frac: bar.progress(frac, text="Reading file...")
         try:
-            df, meta = load_dataframe(file)
+            if mode == "Out-of-core":
+                df, meta = load_columnar(file, sheet_name=sheet_name, progress=on_progress, workbook=workbook)
+            else:
+                df, meta = load_dataframe(
+                    file,
+                    sheet_name=sheet_name,
+                    progress=on_progress,
+                    cache=DATASET_CACHE,
+                    workbook=workbook,
+                    workers=int(parse_workers),
+                )
         except Exception as e:
+            bar.empty()
             st.error(f"Failed to load file: {e}")
             return
+        bar.empty()
 
+        if compact and mode == "In memory":
+            df, meta["compaction"] = compact_dataframe(df)
+
+        previous = st.session_state.get("df")
+        if is_columnar(previous) and previous is not df:
+            previous.discard()  # only deletes a derived (cleaned) file
         st.session_state["df"] = df
         st.session_state["meta"] = meta
 
@@ -137,15 +241,10 @@ def main() -> None:
         st.session_state["insights"] = None
         st.session_state["report_md"] = None
         st.session_state["charts"] = []
+        st.session_state["cube"] = None
 
         st.success("Dataset loaded successfully.")
         st.dataframe(df.head(20), use_container_width=True)
 
-def cleanup_on_exit():
-    charts_dir = Path("artifacts/charts")
-    if charts_dir.exists():
-        shutil.rmtree(charts_dir, ignore_errors=True)
-
 if __name__ == "__main__":
     main()
-    atexit.register(cleanup_on_exit)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+import atexit
+import shutil
+from pathlib import Path
+
+from core.columnar import DEFAULT_OOC_DIR
+
+# saved chart PNGs (Visualize page, read back by the report)
+CHART_DIR = Path("artifacts/charts")
+
+
+# registered on first import, once per process: Streamlit re-executes page scripts on
+# every rerun, but imported modules stay loaded
+@atexit.register
+def cleanup_on_exit() -> None:
+    """Remove the per-run artifacts (saved charts, out-of-core files) when the server exits."""
+    for d in [CHART_DIR, Path(DEFAULT_OOC_DIR)]:
+        if d.exists():
+            shutil.rmtree(d, ignore_errors=True)
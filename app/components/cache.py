@@ -0,0 +1,39 @@
+from __future__ import annotations
+import streamlit as st
+from typing import Any, Callable, Dict, Optional
+
+from core.profiler import profile_dataset, count_missing, count_duplicates
+from core.result_cache import ResultCache
+
+
+def get_result_cache() -> ResultCache:
+    """The session's result cache (shared by every page)."""
+    if st.session_state.get("result_cache") is None:
+        st.session_state["result_cache"] = ResultCache()
+    return st.session_state["result_cache"]
+
+
+def cached(fn: Callable, df, **params) -> Any:
+    return get_result_cache().call(fn, df, **params)
+
+
+def remember_profile(df, profile: Dict[str, Any], **params) -> None:
+    """Store a profile and the totals other pages read from it (missing cells, duplicates)."""
+    cache = get_result_cache()
+    cache.put(df, profile_dataset, profile, **params)
+    cache.put(df, count_missing, int(profile["missing_overall"]["total_missing"]))
+    cache.put(df, count_duplicates, int(profile["duplicates"]["duplicate_rows"]))
+
+
+def fresh_profile(df) -> Optional[Dict[str, Any]]:
+    """The exact profile of this dataset version, if one was computed (None otherwise)."""
+    found, profile = get_result_cache().get(df, profile_dataset, approximate=False)
+    return profile if found else None
+
+
+def cache_stats_caption() -> None:
+    s = get_result_cache().stats()
+    st.caption(
+        f"Result cache: {s['hits']} hits / {s['misses']} misses, "
+        f"{s['entries']} entries, {s['bytes'] / 1024 ** 2:.1f} MB"
+    )
@@ -3,6 +3,13 @@ import os
 import time
 import io
 import streamlit as st
+from typing import Any, Callable, Dict
+
+from core.figures import figure_stats, release_figure
+from core.result_cache import ResultCache
+
+# rendered PNGs kept per session (least recently used dropped first)
+CHART_CACHE_BYTES = 64 * 1024 * 1024
 
 def fig_to_png_bytes(fig, dpi: int = 120) -> bytes:
     buf = io.BytesIO()
@@ -10,14 +17,60 @@ def fig_to_png_bytes(fig, dpi: int = 120) -> bytes:
     buf.seek(0)
     return buf.getvalue()
 
-def show_fig_centered(fig, width: int = 520, dpi: int = 120):
-    """Render centered chart at fixed pixel width (no saving)."""
-    png = fig_to_png_bytes(fig, dpi=dpi)
+def get_chart_cache() -> ResultCache:
+    """The session's rendered-chart cache: PNG bytes per (dataset version, chart, params, dpi)."""
+    if st.session_state.get("chart_cache") is None:
+        st.session_state["chart_cache"] = ResultCache(max_bytes=CHART_CACHE_BYTES)
+    return st.session_state["chart_cache"]
+
+def render_png(df, build: Callable[[], Any], chart: str, params: Dict[str, Any], dpi: int = 120) -> bytes:
+    """PNG of the figure `build()` draws from `df` (the figure is released once encoded)."""
+    fig = build()
+    try:
+        return fig_to_png_bytes(fig, dpi=dpi)
+    finally:
+        release_figure(fig)
+
+def show_png_centered(png: bytes, width: int = 520) -> None:
     left, center, right = st.columns([1, 1, 1])
     with center:
         st.image(png, width=width)
+
+def show_fig_centered(fig, width: int = 520, dpi: int = 120):
+    """Render centered chart at fixed pixel width (no saving)."""
+    try:
+        png = fig_to_png_bytes(fig, dpi=dpi)
+    finally:
+        release_figure(fig)
+    show_png_centered(png, width=width)
     return png  # return bytes for optional save/analyze
 
+def show_chart_centered(df, chart: str, params: Dict[str, Any], build: Callable[[], Any], width: int = 520, dpi: int = 120) -> bytes:
+    """
+    Like show_fig_centered, but the PNG is served from the chart cache while the
+    dataset version, chart and params are unchanged; `build` (which returns the
+    figure) only runs on a miss. Display width is not part of the key: st.image
+    scales the same bytes.
+    """
+    png = get_chart_cache().call(render_png, df, build=build, chart=chart, params=params, dpi=dpi)
+    show_png_centered(png, width=width)
+    return png
+
+def chart_cache_caption() -> None:
+    s = get_chart_cache().stats()
+    st.caption(
+        f"Chart cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%}), "
+        f"{s['entries']} charts, {s['bytes'] / 1024 ** 2:.1f} MB"
+    )
+
+def figure_stats_caption() -> None:
+    s = figure_stats()
+    rss = f", process RSS {s['rss_bytes'] / 1024 ** 2:.0f} MB" if s["rss_bytes"] is not None else ""
+    st.caption(
+        f"Figures: {s['live']} live (peak {s['peak_live']}, cap {s['max_live']} per thread), "
+        f"{s['released']} released, renderer {s['renderer_bytes'] / 1024 ** 2:.1f} MB{rss}"
+    )
+
 def save_png_bytes(png: bytes, save_dir: str, filename_prefix: str = "chart") -> str:
     os.makedirs(save_dir, exist_ok=True)
     ts = int(time.time())
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import streamlit as st
+from typing import Any, Dict, Optional
+
+from core.cube import RollupCube, build_cube, update_cube
+
+
+def cube_sidebar(df) -> Optional[RollupCube]:
+    """
+    Opt-in rollup cube over a few dimension columns of the full dataset. Returns the
+    cube when it serves `df` (group-bys and Top-K bars on other data fall back to
+    the raw frame).
+    """
+    cube = st.session_state.get("cube")
+    with st.sidebar:
+        st.markdown("### Rollup cube")
+        dims = st.multiselect(
+            "Cube dimensions",
+            df.columns.tolist(),
+            default=[d for d in (cube.dims if cube else []) if d in df.columns],
+            max_selections=4,
+            key="cube_dims",
+            help="Pre-aggregates sum/count/min/max of numeric columns over these columns and all their subsets.",
+        )
+        c1, c2 = st.columns(2)
+        if c1.button("Build cube", disabled=not dims, use_container_width=True):
+            try:
+                cube = build_cube(df, dims)
+                st.session_state["cube"] = cube
+            except (ValueError, TypeError) as e:
+                st.error(str(e))
+        if cube is not None and c2.button("Drop cube", use_container_width=True):
+            cube = st.session_state["cube"] = None
+        if cube is not None:
+            state = "active" if cube.serves(df) else "not used for this data"
+            st.caption(
+                f"Cube over {', '.join(map(str, cube.dims))}: {cube.n_groups:,} groups, "
+                f"{len(cube.cuboids)} cuboids, {cube.nbytes / 1024 ** 2:.1f} MB, "
+                f"built in {cube.seconds:.2f}s ({state})."
+            )
+    return cube if cube is not None and cube.serves(df) else None
+
+
+def carry_cube(after, change: Dict[str, Any]) -> None:
+    """Move the session cube to the cleaned dataset (patched in place of a rebuild when possible)."""
+    cube = st.session_state.get("cube")
+    if cube is None:
+        return
+    try:
+        st.session_state["cube"] = update_cube(cube, after, change)
+    except (ValueError, TypeError):
+        st.session_state["cube"] = None
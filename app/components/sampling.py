@@ -0,0 +1,66 @@
+from __future__ import annotations
+import streamlit as st
+from typing import Optional, Tuple, Dict, Any
+
+from core.sampling import sample_dataset
+
+SAMPLE_ROWS_DEFAULT = 100_000
+
+
+def sampling_sidebar(df) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    Session-level sampling switch. Returns (view_df, info): the sample and its info when
+    sampled mode is on, else (df, None). The sample is rebuilt only when the dataset
+    object or the sampling settings change.
+    """
+    with st.sidebar:
+        st.markdown("### Sampling")
+        on = st.checkbox("Sampled interactive mode", key="sample_mode",
+                         help="Charts and snapshots use a reproducible sample; use 'Compute exact' for full-data results.")
+        if not on:
+            return df, None
+        n = int(st.number_input("Sample rows", 1_000, 10_000_000, SAMPLE_ROWS_DEFAULT, 10_000, key="sample_rows"))
+        seed = int(st.number_input("Seed", 0, 1_000_000, 0, key="sample_seed"))
+        strat = st.selectbox("Stratify by", ["(none)"] + [str(c) for c in df.columns], key="sample_stratify")
+
+    key = (n, seed, strat)
+    state = st.session_state.get("_sample")
+    if state is None or state["src"] is not df or state["key"] != key:
+        view, info = sample_dataset(df, n, seed=seed, stratify_by=None if strat == "(none)" else strat)
+        state = {"src": df, "key": key, "view": view, "info": info, "exact": set()}
+        st.session_state["_sample"] = state
+
+    if not state["info"]["sampled"]:
+        return df, None
+    return state["view"], state["info"]
+
+
+def is_exact(result_key: str) -> bool:
+    state = st.session_state.get("_sample")
+    return bool(state) and result_key in state["exact"]
+
+
+def pick_df(df, view_df, info: Optional[Dict[str, Any]], result_key: str):
+    """Frame to compute `result_key` on, plus the sample info to tag it with (None if exact)."""
+    if info is None or is_exact(result_key):
+        return df, None
+    return view_df, info
+
+
+def exact_action(result_key: str, info: Optional[Dict[str, Any]]) -> None:
+    """Sample note with a 'Compute exact' button that re-runs this result on the full data."""
+    if info is None:
+        return
+    if is_exact(result_key):
+        st.caption(f"Exact result on all {info['total_rows']:,} rows.")
+        return
+    c1, c2 = st.columns([6, 2])
+    with c1:
+        st.caption(
+            f"Sample-based: {info['sample_rows']:,} of {info['total_rows']:,} rows "
+            f"({info.get('method')}, seed {info.get('seed')})."
+        )
+    with c2:
+        if st.button("Compute exact", key=f"exact_{result_key}"):
+            st.session_state["_sample"]["exact"].add(result_key)
+            st.rerun()
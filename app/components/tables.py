@@ -43,6 +43,9 @@ def numeric_stats_table(profile: dict, top_k: int = 15) -> pd.DataFrame:
             "p75": s.get("p75"),
             "max": s.get("max"),
         })
+        if "rank_error" in s:
+            # approximate profile: quantiles are within this normalized rank
+            rows[-1]["rank_error"] = s.get("rank_error")
     df = pd.DataFrame(rows)
     if not df.empty:
         df = df.head(top_k)
@@ -1,6 +1,9 @@
 import streamlit as st
 
-from core.profiler import profile_dataset
+from core.columnar import is_columnar
+from core.profiler import profile_dataset, update_profile
+from app.components.cache import cached, remember_profile, cache_stats_caption
+from app.components.cube import carry_cube
 from app.components.tables import (
     show_df, missing_table, dtypes_table, numeric_stats_table
 )
@@ -19,14 +22,43 @@ if df is None:
     st.stop()
 
 # -------------------------
-# Profile cache (value-based)
+# Profile (session result cache, keyed by dataset version)
 # -------------------------
-def refresh_profile():
-    st.session_state["profile"] = profile_dataset(st.session_state["df"])
-
-if st.session_state.get("profile") is None:
-    refresh_profile()
+# out-of-core data only: in memory the exact profile is the faster one
+approx = is_columnar(df) and st.toggle(
+    "Approximate profile (sketches)",
+    key="profile_approx",
+    help="Streams the out-of-core file once in row batches, so memory stays bounded by one batch. "
+         "Quantiles, distinct counts and top values come from mergeable sketches and are shown with "
+         "their error bounds. It is not faster than the exact profile.",
+)
 
+def refresh_profile(force: bool = False):
+    df_ = st.session_state["df"]
+    workers = st.session_state.get("compute_workers")
+    if force:
+        profile = profile_dataset(df_, approximate=approx, workers=workers)
+    else:
+        profile = cached(profile_dataset, df_, approximate=approx, workers=workers)
+    remember_profile(df_, profile, approximate=approx)
+    st.session_state["profile"] = profile
+
+def apply_cleaning(after, change):
+    """
+    Store the cleaned data and patch the current profile (and rollup cube) from the
+    change record. A superseded out-of-core cleaning output is deleted from disk.
+    """
+    before = st.session_state["df"]
+    st.session_state["df"] = after
+    profile = update_profile(st.session_state["profile"], after, change)
+    remember_profile(after, profile, approximate=approx)
+    st.session_state["profile"] = profile
+    carry_cube(after, change)
+    if is_columnar(before) and before is not after:
+        before.discard()
+
+# a cache hit on reruns; cleaning stores the patched profile under the new version
+refresh_profile()
 profile = st.session_state["profile"]
 
 # -------------------------
@@ -98,7 +130,9 @@ cat_sum = profile.get("categorical_summary", {})
 for col, info in cat_sum.items():
     uniq = int(info.get("unique", 0))
     if uniq > 200:
-        notes.append(f"High-cardinality column `{col}`: {uniq} unique values (may need grouping).")
+        err = info.get("unique_error")
+        approx_note = f" (±{err})" if err is not None else ""
+        notes.append(f"High-cardinality column `{col}`: {uniq}{approx_note} unique values (may need grouping).")
 
 if notes:
     for n in notes:
@@ -120,9 +154,8 @@ with st.expander("Quick cleaning", expanded=False):
             num_strategy = st.selectbox("Numeric fill", ["mean", "median", "min", "max"], index=0)
             if st.button("Apply fill", use_container_width=True):
                 before = st.session_state["df"]
-                after = fill_missing(before, numeric=num_strategy, categorical="mode")
-                st.session_state["df"] = after
-                refresh_profile()
+                after, change = fill_missing(before, numeric=num_strategy, categorical="mode", return_change=True)
+                apply_cleaning(after, change)
                 st.success(str(summarize_cleaning(before, after)))
 
         else:
@@ -136,9 +169,8 @@ with st.expander("Quick cleaning", expanded=False):
                 )
             if st.button("Drop rows", use_container_width=True):
                 before = st.session_state["df"]
-                after = drop_missing_rows(before, how=mode, thresh=thresh)
-                st.session_state["df"] = after
-                refresh_profile()
+                after, change = drop_missing_rows(before, how=mode, thresh=thresh, return_change=True)
+                apply_cleaning(after, change)
                 st.success(str(summarize_cleaning(before, after)))
 
     with right:
@@ -148,9 +180,8 @@ with st.expander("Quick cleaning", expanded=False):
 
         if st.button("Drop duplicates", use_container_width=True):
             before = st.session_state["df"]
-            after = drop_duplicates_rows(before, subset=subset_cols, keep=keep)
-            st.session_state["df"] = after
-            refresh_profile()
+            after, change = drop_duplicates_rows(before, subset=subset_cols, keep=keep, return_change=True)
+            apply_cleaning(after, change)
             st.success(str(summarize_cleaning(before, after)))
 
 st.divider()
@@ -159,5 +190,7 @@ st.divider()
 # Recompute button
 # -------------------------
 if st.button("Recompute profile"):
-    refresh_profile()
+    refresh_profile(force=True)
     st.rerun()
+
+cache_stats_caption()
@@ -1,15 +1,25 @@
 import json
+from contextlib import closing
 import numpy as np
 import pandas as pd
 import streamlit as st
 
 from core.visualizer import (
-    fig_hist, fig_bar_topk, fig_scatter, fig_corr_heatmap, fig_line_timeseries
+    fig_hist, fig_bar_topk, fig_scatter, fig_corr_heatmap, fig_line_timeseries, SCATTER_MAX_POINTS
 )
-from app.components.charts import show_fig_centered, save_png_bytes
+from app.components.artifacts import CHART_DIR
+from app.components.charts import show_chart_centered, save_png_bytes, chart_cache_caption, figure_stats_caption
+from app.components.sampling import sampling_sidebar, pick_df, exact_action
+from app.components.cube import cube_sidebar
+from app.components.cache import cached
 from core.chart_summary import (
-    summarize_hist, summarize_topk_bar, summarize_scatter
+    summarize_hist, summarize_topk_bar, summarize_scatter, summarize_timeseries
 )
+from core.gallery import iter_gallery
+from core.histogram import density_grid, histogram
+from core.result_cache import dataset_version
+from core.sampling import sample_scale, tag_sample
+from core.timeseries import scale_timeseries, timeseries
 from llm.client import call_llm
 from llm.prompts import CHART_INSIGHT_PROMPT
 
@@ -20,6 +30,12 @@ if df is None:
     st.warning("Please upload a dataset first.")
     st.stop()
 
+view_df, sample_info = sampling_sidebar(df)
+cube = cube_sidebar(df)
+with st.sidebar:
+    chart_cache_caption()
+    figure_stats_caption()
+
 # --------------------------
 # Auto-clear insight on change
 # --------------------------
@@ -38,11 +54,11 @@ def auto_clear_insight_if_changed(sig: str):
 # --------------------------
 chart_type = st.selectbox(
     "Chart type",
-    ["Histogram", "Top-K Bar", "Scatter", "Correlation Heatmap", "Time Series Line"]
+    ["Histogram", "Top-K Bar", "Scatter", "Correlation Heatmap", "Time Series Line", "Gallery"]
 )
 img_width = st.slider("Chart width (px)", 320, 900, 520, 20)
 
-art_dir = "artifacts/charts"
+art_dir = str(CHART_DIR)
 
 # --------------------------
 # Actions (Save / Analyze)
@@ -109,12 +125,20 @@ if chart_type == "Histogram":
     bins = st.slider("Bins", 5, 100, 30)
 
     params = {"col": col, "bins": bins}
-    auto_clear_insight_if_changed(chart_signature("Histogram", params))
-
-    fig = fig_hist(df, col=col, bins=bins)
-    png = show_fig_centered(fig, width=img_width)
-
-    summary = summarize_hist(df, col=col)
+    sig = chart_signature("Histogram", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
+
+    # counts over a sample are drawn and summarized as full-data estimates
+    scale = sample_scale(info)
+    hist = cached(histogram, data, col=col, bins=bins)
+    png = show_chart_centered(
+        data, "Histogram", {**params, "scale": scale},
+        lambda: fig_hist(data, col=col, bins=bins, hist=hist, scale=scale), width=img_width,
+    )
+    exact_action(sig, sample_info)
+
+    summary = tag_sample(summarize_hist(data, col=col, hist=hist, scale=scale), info, scaled=True)
     render_actions(png, filename_prefix="hist", summary=summary, chart_key=f"hist_{col}")
 
 
@@ -123,12 +147,18 @@ elif chart_type == "Top-K Bar":
     k = st.slider("Top K", 5, 50, 20)
 
     params = {"col": col, "k": k}
-    auto_clear_insight_if_changed(chart_signature("Top-K Bar", params))
-
-    fig = fig_bar_topk(df, col=col, k=k)
-    png = show_fig_centered(fig, width=img_width)
-
-    summary = summarize_topk_bar(df, col=col, k=k)
+    sig = chart_signature("Top-K Bar", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
+
+    scale = sample_scale(info)
+    png = show_chart_centered(
+        data, "Top-K Bar", {**params, "scale": scale},
+        lambda: fig_bar_topk(data, col=col, k=k, cube=cube, scale=scale), width=img_width,
+    )
+    exact_action(sig, sample_info)
+
+    summary = tag_sample(summarize_topk_bar(data, col=col, k=k, cube=cube, scale=scale), info, scaled=True)
     render_actions(png, filename_prefix="bar", summary=summary, chart_key=f"bar_{col}")
 
 
@@ -140,29 +170,41 @@ elif chart_type == "Scatter":
 
     x = st.selectbox("X", num_cols, index=0)
     y = st.selectbox("Y", num_cols, index=1)
-
-    params = {"x": x, "y": y}
-    auto_clear_insight_if_changed(chart_signature("Scatter", params))
-
-    fig = fig_scatter(df, x=x, y=y)
-    png = show_fig_centered(fig, width=img_width)
-
-    summary = summarize_scatter(df, x=x, y=y)
+    c1, c2 = st.columns(2)
+    mode = c1.selectbox("Mode", ["Auto", "Points", "Density"], help="Auto draws a density raster above the point limit.")
+    max_points = int(c2.number_input("Density above (points)", 1_000, 10_000_000, SCATTER_MAX_POINTS, 10_000))
+
+    params = {"x": x, "y": y, "mode": mode, "max_points": max_points}
+    sig = chart_signature("Scatter", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
+
+    density = cached(density_grid, data, x=x, y=y) if mode != "Points" else None
+    if density is not None and mode == "Auto" and density["n_points"] <= max_points:
+        density = None
+    png = show_chart_centered(
+        data, "Scatter", params, lambda: fig_scatter(data, x=x, y=y, max_points=len(data), density=density), width=img_width
+    )
+    exact_action(sig, sample_info)
+
+    summary = tag_sample(summarize_scatter(data, x=x, y=y, density=density), info)
     render_actions(png, filename_prefix="scatter", summary=summary, chart_key=f"scatter_{x}_{y}")
 
 
 elif chart_type == "Correlation Heatmap":
-    params = {"max_width": min(img_width, 700)}
-    auto_clear_insight_if_changed(chart_signature("Correlation Heatmap", params))
+    params = {}
+    sig = chart_signature("Correlation Heatmap", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
 
     try:
-        fig = fig_corr_heatmap(df)
-        png = show_fig_centered(fig, width=min(img_width, 700))
+        png = show_chart_centered(data, "Correlation Heatmap", params, lambda: fig_corr_heatmap(data), width=min(img_width, 700))
+        exact_action(sig, sample_info)
 
-        summary = {
+        summary = tag_sample({
             "type": "corr_heatmap",
             "note": "Correlation heatmap for numeric columns. Use computed correlations (e.g., top pairs) for deeper insights."
-        }
+        }, info)
         render_actions(png, filename_prefix="corr", summary=summary, chart_key="corr_heatmap")
 
     except ValueError as e:
@@ -178,48 +220,90 @@ elif chart_type == "Time Series Line":
 
     value_col = st.selectbox("Value column", num_cols)
     freq = st.selectbox("Frequency", ["D", "W", "M", "Q"])
-    agg = st.selectbox("Aggregation", ["sum", "mean", "count"])
+    agg = st.selectbox("Aggregation", ["sum", "mean", "count", "min", "max"])
 
     params = {"date_col": date_col, "value_col": value_col, "freq": freq, "agg": agg}
-    auto_clear_insight_if_changed(chart_signature("Time Series Line", params))
+    sig = chart_signature("Time Series Line", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
 
     try:
-        fig = fig_line_timeseries(df, date_col=date_col, value_col=value_col, freq=freq, agg=agg)
-        png = show_fig_centered(fig, width=img_width)
-
-        # Grounded series summary
-        d = df[[date_col, value_col]].copy()
-        d[date_col] = pd.to_datetime(d[date_col], errors="coerce")
-        if d.empty:
-            st.info("No valid datetime values found for the selected date column.")
-            st.stop()
-
-        d = d.set_index(date_col)
-        if agg == "sum":
-            ts = d[value_col].resample(freq).sum()
-        elif agg == "mean":
-            ts = d[value_col].resample(freq).mean()
-        else:
-            ts = d[value_col].resample(freq).count()
-
-        if ts.empty:
+        ts = cached(timeseries, data, date_col=date_col, value_col=value_col, freq=freq, agg=agg)
+        if ts["series"].empty:
             st.info("Time series is empty after aggregation.")
             st.stop()
-
-        summary = {
-            "type": "timeseries",
-            "value": value_col,
-            "agg": agg,
-            "freq": freq,
-            "n_points": int(len(ts)),
-            "start": float(ts.iloc[0]),
-            "end": float(ts.iloc[-1]),
-            "trend_abs": float(ts.iloc[-1] - ts.iloc[0]) if len(ts) >= 2 else 0.0,
-            "peak": {"time": str(ts.idxmax().date()), "value": float(ts.max())},
-            "trough": {"time": str(ts.idxmin().date()), "value": float(ts.min())},
-        }
+        # sums and counts over a sample are scaled to full-data estimates (a new dict: `ts` is cached)
+        scale = sample_scale(info)
+        ts = scale_timeseries(ts, scale)
+        png = show_chart_centered(
+            data, "Time Series Line", {**params, "scale": ts.get("scale", 1.0)},
+            lambda: fig_line_timeseries(data, date_col=date_col, value_col=value_col, freq=freq, agg=agg, ts=ts),
+            width=img_width,
+        )
+        exact_action(sig, sample_info)
+
+        # Grounded series summary, from the same resampled series
+        series = ts["series"]
+        summary = summarize_timeseries(series.index, series.values, value_col=value_col, agg=agg, freq=freq)
+        if ts["downsampled"]:
+            summary["plotted_points"] = int(len(ts["plot"]))
+        summary = tag_sample(summary, info, scaled="scale" in ts)
 
         render_actions(png, filename_prefix="ts", summary=summary, chart_key=f"ts_{date_col}_{value_col}")
 
     except ValueError as e:
         st.error(str(e))
+
+
+elif chart_type == "Gallery":
+    cols = st.multiselect("Columns", df.columns.tolist(), help="Leave empty for every column.")
+    c1, c2 = st.columns(2)
+    k = c1.slider("Top K (categorical)", 5, 30, 10)
+    bins = c2.slider("Bins (numeric)", 5, 100, 30)
+
+    params = {"cols": cols, "k": k, "bins": bins}
+    sig = chart_signature("Gallery", params)
+    auto_clear_insight_if_changed(sig)
+    data, info = pick_df(df, view_df, sample_info, sig)
+    n_tiles = len(cols) if cols else data.shape[1]
+    key = (dataset_version(data), sig)
+
+    b1, b2, _ = st.columns([2, 2, 6])
+    start = b1.button(f"Render {n_tiles} charts")
+    # any click reruns the page, which stops a render in progress (finished charts are kept)
+    b2.button("Cancel")
+    exact_action(sig, sample_info)
+
+    state = st.session_state.get("gallery")
+    if start:
+        state = st.session_state["gallery"] = {"key": key, "tiles": [], "total": n_tiles, "done": False}
+    if state is None or state["key"] != key:
+        st.caption("Histograms of numeric columns and top-K bars of the rest, rendered on the analysis worker pool.")
+        st.stop()
+
+    status = st.empty()
+    grid = st.columns(4)
+
+    def show_tile(i: int, tile: dict):
+        with grid[i % len(grid)]:
+            if tile["png"] is not None:
+                st.image(tile["png"], caption=str(tile["column"]), use_container_width=True)
+            else:
+                st.caption(f"{tile['column']}: {tile['error']}")
+
+    for i, tile in enumerate(state["tiles"]):
+        show_tile(i, tile)
+    if start:
+        progress = status.progress(0.0, text=f"0 / {n_tiles} charts")
+        workers = st.session_state.get("compute_workers")
+        with closing(iter_gallery(data, cols, k=k, bins=bins, workers=workers, scale=sample_scale(info))) as tiles:
+            for tile in tiles:
+                show_tile(len(state["tiles"]), tile)
+                state["tiles"].append(tile)
+                progress.progress(len(state["tiles"]) / n_tiles, text=f"{len(state['tiles'])} / {n_tiles} charts")
+        state["done"] = True
+
+    done = len(state["tiles"])
+    status.caption(f"{done} charts." if state["done"] else f"Cancelled after {done} of {state['total']} charts.")
+    with st.expander("Summaries"):
+        st.json([tag_sample(t["summary"], info, scaled=True) for t in state["tiles"] if t["summary"] is not None], expanded=False)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
 import numpy as np
@@ -9,6 +9,14 @@ import pandas as pd
 import streamlit as st
 
 from core.analyzer import top_correlations, outlier_summary_iqr, groupby_aggregate
+from core.association import KENDALL_ROWS, top_associations
+from core.columnar import is_columnar
+from core.outliers import detect_outliers
+from core.profiler import count_missing, count_duplicates
+from core.sampling import ADDITIVE_AGGS, sample_scale, tag_sample
+from app.components.sampling import sampling_sidebar
+from app.components.cache import cached, cache_stats_caption, fresh_profile
+from app.components.cube import cube_sidebar
 from llm.client import call_llm
 from llm.prompts import CHART_INSIGHT_PROMPT
 
@@ -20,6 +28,11 @@ if df is None:
     st.warning("Please upload a dataset first.")
     st.stop()
 
+view_df, sample_info = sampling_sidebar(df)
+cube = cube_sidebar(df)
+with st.sidebar:
+    cache_stats_caption()
+
 
 # --------------------------
 # Session init
@@ -33,6 +46,18 @@ st.session_state.setdefault("report_sections", [])          # report builder (op
 # --------------------------
 # Helpers
 # --------------------------
+# Relationships measures: label -> (core function, method)
+MEASURES = {
+    "Pearson": (top_correlations, "pearson"),
+    "Spearman": (top_correlations, "spearman"),
+    "Kendall": (top_correlations, "kendall"),
+    "Cramér's V": (top_associations, "cramers_v"),
+    "Correlation ratio": (top_associations, "correlation_ratio"),
+}
+
+OUTLIER_METHODS = {"IQR": "iqr", "Z-score": "zscore", "MAD (modified z)": "mad"}
+
+
 def sig(scope: str, params: Dict[str, Any]) -> str:
     return f"{scope}::{tuple(sorted(params.items()))}"
 
@@ -61,13 +86,13 @@ def df_to_md_table(df_: pd.DataFrame, max_rows: int = 10) -> str:
 
 def compute_overview(df_: pd.DataFrame) -> Dict[str, Any]:
     n_rows, n_cols = df_.shape
-    missing_cells = int(df_.isna().sum().sum())
+    missing_cells = cached(count_missing, df_)
     total_cells = int(n_rows * n_cols) if n_rows and n_cols else 0
     missing_pct = float(missing_cells / total_cells) if total_cells else 0.0
-    dup_rows = int(df_.duplicated().sum())
+    dup_rows = cached(count_duplicates, df_)
 
     num_cols = df_.select_dtypes(include=[np.number]).columns.tolist()
-    cat_cols = df_.select_dtypes(include=["object", "category", "bool"]).columns.tolist()
+    cat_cols = df_.select_dtypes(include=["object", "category", "bool", "string"]).columns.tolist()
 
     return {
         "shape": {"rows": n_rows, "cols": n_cols},
@@ -100,21 +125,52 @@ def compute_scope_payload(
     top_n: int,
     group_cols: List[str],
     metric_cols: List[str],
-    metric_agg: str
+    metric_agg: str,
+    measures: List[str],
+    outlier_method: str,
+    kendall_rows: Optional[int] = None,
+    scale: float = 1.0,
 ) -> Dict[str, Any]:
-    """Only scope-specific info (no quick findings here)."""
+    """
+    Only scope-specific info (no quick findings here). `scale` (sample_scale of a
+    sampled `df_`) turns groupby sums and counts into full-data estimates.
+    """
     payload: Dict[str, Any] = {"scope": scope}
-
-    if scope in ["Overview", "Relationships (Correlations)"]:
-        payload["top_correlations"] = top_correlations(df_, top_n=top_n)
-
-    if scope in ["Overview", "Outliers (IQR)"]:
-        payload["outliers_iqr"] = outlier_summary_iqr(df_)
+    workers = st.session_state.get("compute_workers")
+
+    if scope == "Overview" or (scope == "Relationships (Correlations)" and "Pearson" in measures):
+        payload["top_correlations"] = cached(top_correlations, df_, top_n=top_n, workers=workers)
+
+    if scope == "Relationships (Correlations)":
+        associations: Dict[str, Any] = {}
+        for label in measures:
+            fn, method = MEASURES[label]
+            if method == "pearson":
+                continue
+            if method == "kendall":
+                associations[label] = cached(fn, df_, top_n=top_n, method=method, workers=workers, kendall_rows=kendall_rows)
+            elif fn is top_correlations:
+                associations[label] = cached(fn, df_, top_n=top_n, method=method, workers=workers)
+            else:
+                associations[label] = cached(fn, df_, top_n=top_n, method=method)
+        if associations:
+            payload["associations"] = associations
+
+    if scope == "Overview":
+        payload["outliers_iqr"] = cached(outlier_summary_iqr, df_, workers=workers, profile=fresh_profile(df_))
+
+    if scope == "Outliers":
+        summary, _ = outlier_flags(df_, outlier_method)
+        payload["outliers"] = {"method": outlier_method, "columns": summary}
 
     if scope == "Groupby Aggregation":
         if group_cols and metric_cols:
             metrics = {c: metric_agg for c in metric_cols}
-            table = groupby_aggregate(df_, group_cols=group_cols, metrics=metrics, top_n=top_n)
+            table = cached(groupby_aggregate, df_, group_cols=group_cols, metrics=metrics, top_n=top_n, cube=cube)
+            if scale != 1 and metric_agg in ADDITIVE_AGGS:
+                table = table.copy()  # the cached table is shared
+                for c in metric_cols:
+                    table[c] = table[c] * scale if metric_agg == "sum" else np.rint(table[c] * scale).astype(np.int64)
             payload["groupby"] = {
                 "group_cols": group_cols,
                 "metrics": metrics,
@@ -124,16 +180,57 @@ def compute_scope_payload(
     return payload
 
 
+def outlier_flags(df_, method_label: str):
+    """(summary, OutlierFlags) for one method; cached, so the row view reuses the snapshot's run."""
+    return cached(
+        detect_outliers, df_, method=OUTLIER_METHODS[method_label], return_flags=True,
+        workers=st.session_state.get("compute_workers"), profile=fresh_profile(df_),
+    )
+
+
+def outlier_rows_view(df_, method_label: str) -> None:
+    """Rows flagged by the current outlier method, flagged cells highlighted."""
+    summary, flags = outlier_flags(df_, method_label)
+    if not flags.columns:
+        st.caption("No outlier rows.")
+        return
+    chosen = st.multiselect("Outlier in any of", flags.columns, default=flags.columns, key="outlier_row_cols")
+    pos = flags.positions(chosen)
+    st.caption(f"{len(pos):,} of {flags.n_rows:,} rows are outliers in the selected columns (showing up to 500).")
+    pos = pos[:500]
+    rows = df_.take(pos) if is_columnar(df_) else df_.iloc[pos]
+    marks = pd.DataFrame(
+        {c: flags.mask([c])[pos] if c in chosen else np.zeros(len(pos), dtype=bool) for c in rows.columns},
+        index=rows.index,
+    )
+    st.dataframe(rows.style.apply(lambda _: np.where(marks, "background-color: #ffd6d6", ""), axis=None))
+
+
 def scope_payload_to_md(scope_payload: Dict[str, Any]) -> str:
     lines: List[str] = []
     scope = scope_payload.get("scope", "Overview")
 
+    smp = scope_payload.get("sample")
+    if smp:
+        scaled = f"; sums and counts scaled by {smp['scale_factor']:g} to full-data estimates" if "scale_factor" in smp else ""
+        lines.append(f"_Sample-based: {smp['sample_rows']:,} of {smp['total_rows']:,} rows ({smp.get('method')}){scaled}._\n")
+
     corrs = scope_payload.get("top_correlations") or []
     if corrs:
         lines.append("### Top correlations (abs)")
         for r in corrs[:10]:
             lines.append(f"- {r['col1']} vs {r['col2']}: **{r['abs_corr']:.3f}**")
 
+    for label, pairs in (scope_payload.get("associations") or {}).items():
+        lines.append(f"\n### Top associations: {label}")
+        if not pairs:
+            lines.append("- _(no eligible column pairs)_")
+        for r in pairs[:10]:
+            value = r["corr"] if "corr" in r else r["value"]
+            # sampled Kendall pairs carry their row count and standard error
+            err = f" ± {r['se']:.3f} (SE, n={r['n']:,} sampled rows)" if "se" in r else ""
+            lines.append(f"- {r['col1']} vs {r['col2']}: **{value:.3f}**{err}")
+
     outd = scope_payload.get("outliers_iqr") or {}
     if outd:
         items = sorted(outd.items(), key=lambda kv: kv[1].get("outlier_pct", 0.0), reverse=True)[:10]
@@ -141,6 +238,13 @@ def scope_payload_to_md(scope_payload: Dict[str, Any]) -> str:
         for col, info in items:
             lines.append(f"- `{col}`: {info.get('outlier_pct', 0.0)*100:.2f}% outliers")
 
+    outs = scope_payload.get("outliers") or {}
+    if outs.get("columns"):
+        items = sorted(outs["columns"].items(), key=lambda kv: kv[1].get("outlier_pct", 0.0), reverse=True)[:10]
+        lines.append(f"\n### Outliers ({outs['method']})")
+        for col, info in items:
+            lines.append(f"- `{col}`: {info.get('outlier_pct', 0.0)*100:.2f}% outliers")
+
     gb = scope_payload.get("groupby")
     if gb and gb.get("preview"):
         lines.append("\n### Groupby snapshot")
@@ -163,7 +267,7 @@ def append_to_report(title: str, content: str):
 # --------------------------
 scope = st.selectbox(
     "Insight scope",
-    ["Overview", "Relationships (Correlations)", "Outliers (IQR)", "Groupby Aggregation"],
+    ["Overview", "Relationships (Correlations)", "Outliers", "Groupby Aggregation"],
 )
 
 top_n = st.slider("Top N (for correlations / tables)", 5, 50, 10)
@@ -171,6 +275,28 @@ top_n = st.slider("Top N (for correlations / tables)", 5, 50, 10)
 group_cols: List[str] = []
 metric_cols: List[str] = []
 metric_agg = "sum"
+measures: List[str] = ["Pearson"]
+outlier_method = "IQR"
+kendall_sampled = False
+
+if scope == "Outliers":
+    outlier_method = st.selectbox("Method", list(OUTLIER_METHODS), help="IQR: 1.5 x IQR fences; Z-score: |z| > 3; MAD: |modified z| > 3.5.")
+    with st.expander("Outlier rows"):
+        outlier_rows_view(view_df, outlier_method)
+
+if scope == "Relationships (Correlations)":
+    measures = st.multiselect(
+        "Measures",
+        list(MEASURES),
+        default=["Pearson"],
+        help="Cramér's V / correlation ratio use categorical columns with at most 100 levels.",
+    )
+    if "Kendall" in measures:
+        kendall_sampled = st.checkbox(
+            f"Sample Kendall above {KENDALL_ROWS:,} rows",
+            help=f"Kendall runs on every row by default. This runs it on a fixed {KENDALL_ROWS:,}-row sample "
+                 "instead and reports each pair's rows used and standard error. Compute exact ignores it.",
+        )
 
 if scope == "Groupby Aggregation":
     group_cols = st.multiselect(
@@ -188,6 +314,9 @@ params_for_sig = {
     "group_cols": tuple(group_cols),
     "metric_cols": tuple(metric_cols),
     "agg": metric_agg,
+    "measures": tuple(measures),
+    "outlier_method": outlier_method,
+    "kendall_sampled": kendall_sampled,
 }
 current_sig = sig(scope, params_for_sig)
 
@@ -211,16 +340,35 @@ with c3:
 with c4:
     st.caption("Snapshots are stored in history. Overview snapshots include Quick findings; other scopes do not.")
 
+exact_clicked = False
+if sample_info:
+    e1, e2 = st.columns([2, 10])
+    with e1:
+        exact_clicked = st.button("🎯 Compute exact", use_container_width=True)
+    with e2:
+        st.caption(
+            f"Snapshots use a {sample_info['sample_rows']:,}-row sample of {sample_info['total_rows']:,} rows. "
+            "Compute exact re-runs the same analysis on the full data."
+        )
+
 # --------------------------
 # Generate snapshot -> history (no duplicates)
 # --------------------------
-if gen_clicked:
+if gen_clicked or exact_clicked:
     gen_id = f"{current_sig}::{datetime.now().timestamp()}"
     # prevent double-append due to rerun
     if st.session_state.get("_last_gen_id") != gen_id:
         st.session_state["_last_gen_id"] = gen_id
 
-        scope_payload = compute_scope_payload(df, scope, top_n, group_cols, metric_cols, metric_agg)
+        data = df if exact_clicked else view_df
+        info = None if exact_clicked else sample_info
+        scope_payload = compute_scope_payload(
+            data, scope, top_n, group_cols, metric_cols, metric_agg, measures, outlier_method,
+            kendall_rows=KENDALL_ROWS if kendall_sampled and not exact_clicked else None,
+            scale=sample_scale(info),
+        )
+        scaled = "groupby" in scope_payload and metric_agg in ADDITIVE_AGGS
+        scope_payload = tag_sample(scope_payload, info, scaled=scaled)
 
         # computed markdown: Overview includes quick findings; others do NOT
         if scope == "Overview":
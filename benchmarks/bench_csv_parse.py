@@ -0,0 +1,107 @@
+"""
+Compare single-threaded pd.read_csv (the default load_dataframe path) against
+load_csv_parallel on synthetic CSVs.
+
+    python benchmarks/bench_csv_parse.py --rows 1000000 10000000 --workers 8
+"""
+from __future__ import annotations
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.loader import load_csv_chunked, load_csv_parallel
+
+
+def make_csv(path: str, rows: int, seed: int = 0, block: int = 1_000_000) -> None:
+    rng = np.random.default_rng(seed)
+    cities = np.array(["Hanoi", "Da Nang", "Ho Chi Minh City", "Hue", 'Can Tho, "south"'])
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for start in range(0, rows, block):
+            n = min(block, rows - start)
+            df = pd.DataFrame({
+                "id": np.arange(start, start + n),
+                "city": rng.choice(cities, n),
+                "revenue": rng.gamma(2.0, 150.0, n).round(2),
+                "quantity": rng.integers(1, 50, n),
+                "score": rng.normal(size=n),
+                "note": rng.choice(["", "ok", "multi\nline"], n),
+            })
+            df.to_csv(f, index=False, header=(start == 0))
+
+
+class _Upload(io.BytesIO):
+    name = "bench.csv"
+
+
+def make_mixed_csv(rows: int = 200_000) -> bytes:
+    """A column that is int for most of the file and turns to text near the end."""
+    code = np.arange(rows).astype(str).astype(object)
+    code[-rows // 10:] = "A" + code[-rows // 10:]
+    return pd.DataFrame({"code": code, "x": np.arange(rows) * 0.5}).to_csv(index=False).encode()
+
+
+def check_mixed_kinds(workers: int) -> None:
+    """Loaders must read a column that turns to text late as str, as one read_csv does."""
+    raw = make_mixed_csv()
+    ref = pd.read_csv(_Upload(raw), low_memory=False)
+    for pool in ("thread", "process"):
+        for w in sorted({1, 2, workers}):
+            pd.testing.assert_frame_equal(load_csv_parallel(_Upload(raw), workers=w, pool=pool), ref)
+    pd.testing.assert_frame_equal(load_csv_chunked(_Upload(raw), chunk_rows=50_000), ref)
+    print("mixed-kind column: loaders match read_csv")
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--repeat", type=int, default=1)
+    args = ap.parse_args()
+
+    check_mixed_kinds(args.workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f"bench_{rows}.csv")
+            make_csv(path, rows)
+            raw = Path(path).read_bytes()
+            print(f"\n{rows:,} rows ({len(raw) / 1024 ** 2:,.0f} MB), {args.workers} workers")
+
+            runs = {
+                "read_csv (baseline)": lambda: pd.read_csv(_Upload(raw)),
+                "parallel / threads": lambda: load_csv_parallel(_Upload(raw), workers=args.workers, pool="thread"),
+                "parallel / processes": lambda: load_csv_parallel(_Upload(raw), workers=args.workers, pool="process"),
+            }
+            ref = None
+            base = None
+            for label, fn in runs.items():
+                best = float("inf")
+                for _ in range(args.repeat):
+                    df, secs = timed(fn)
+                    best = min(best, secs)
+                if ref is None:
+                    ref, base = df, best
+                else:
+                    pd.testing.assert_frame_equal(df, ref)
+                print(f"  {label:<22} {best:8.2f}s  x{base / best:4.1f}")
+                del df
+
+
+if __name__ == "__main__":
+    main()
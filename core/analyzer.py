@@ -1,31 +1,87 @@
 from __future__ import annotations
+import time
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional
 
-def top_correlations(df: pd.DataFrame, top_n: int = 10) -> List[Dict[str, Any]]:
-    num = df.select_dtypes(include=[np.number])
-    if num.shape[1] < 2:
-        return []
+from core.association import kendall_pairs, spearman_pairs
+from core.columnar import is_columnar, iter_column_batches
+from core.correlation import correlation_pairs, top_pairs_from_matrix
+from core.cube import RollupCube
+from core.group_index import GroupIndex, SUPPORTED_AGGS, get_group_index, top_groups
+from core.outliers import detect_outliers
+from core.sketches import KLLSketch
 
-    corr = num.corr(numeric_only=True).abs()
-    # take upper triangle without diagonal
-    upper = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
-    pairs = upper.stack().sort_values(ascending=False).head(top_n)
+def top_correlations(
+    df: pd.DataFrame,
+    top_n: Optional[int] = 10,
+    workers: Optional[int] = None,
+    float32: bool = False,
+    threshold: Optional[float] = None,
+    return_info: bool = False,
+    method: str = "pearson",
+    kendall_rows: Optional[int] = None,
+):
+    """
+    Strongest pairs by |r| (top_n, and/or all pairs with |r| >= threshold).
+    method: "pearson", "spearman" (Pearson on ranks, pairwise-complete) or "kendall" (tau-b in
+    O(n log n) per pair, see core.association; kendall_rows opts into a row sample of
+    that size on larger data). In-memory Pearson uses the blocked
+    engine in core.correlation, which never builds the full matrix; return_info=True
+    also returns its timing.
+    """
+    # column names only: select_dtypes on a frame would copy the data
+    cols = [c for c, t in df.dtypes.items() if pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t)]
+    if len(cols) < 2:
+        return ([], {}) if return_info else []
 
-    results = []
-    for (c1, c2), v in pairs.items():
-        results.append({"col1": c1, "col2": c2, "abs_corr": float(v)})
-    return results
+    if method == "spearman":
+        results, info = spearman_pairs(df, cols, k=top_n, threshold=threshold, float32=float32, workers=workers)
+    elif method == "kendall":
+        results, info = kendall_pairs(df, cols, k=top_n, threshold=threshold, max_rows=kendall_rows, workers=workers)
+    elif method != "pearson":
+        raise ValueError(f"Unknown correlation method: {method}")
+    elif is_columnar(df):
+        # out-of-core datasets accumulate the same pairwise statistics in row batches
+        t0 = time.perf_counter()
+        results = top_pairs_from_matrix(df.corr(cols), k=top_n, threshold=threshold)
+        info = {"columns": len(cols), "seconds": float(time.perf_counter() - t0)}
+    else:
+        results, info = correlation_pairs(
+            df[cols], k=top_n, threshold=threshold, float32=float32, workers=workers
+        )
+    info["method"] = method
+    return (results, info) if return_info else results
+
+def _top_rows(first: pd.Series, top_n: int) -> np.ndarray:
+    """Positions of the top_n groups by the first metric (descending, missing last)."""
+    if pd.api.types.is_numeric_dtype(first.dtype):
+        return top_groups(first, top_n)
+    order = first.reset_index(drop=True).sort_values(ascending=False, na_position="last")
+    return order.index.to_numpy()[:top_n]
+
+def _aggregate_with_index(df, index: GroupIndex, metrics: Dict[str, str], top_n: int) -> pd.DataFrame:
+    """groupby_aggregate from a cached GroupIndex: only the reductions run per call."""
+    reduced = {col: index.reduce(df[col], agg) for col, agg in metrics.items()}
+    groups = _top_rows(reduced[next(iter(metrics))], top_n)
+    out = index.keys(df, groups)
+    for col, values in reduced.items():
+        out[col] = values.to_numpy()[groups]
+    return out
 
 def groupby_aggregate(
     df: pd.DataFrame,
     group_cols: List[str],
     metrics: Dict[str, str],
-    top_n: int = 20
+    top_n: int = 20,
+    cube: Optional[RollupCube] = None,
 ) -> pd.DataFrame:
     """
     metrics example: {"revenue":"sum", "quantity":"mean"}
+    Group keys are factorized once per dataset version and group columns
+    (core.group_index), so changing metrics, aggregation or top_n only re-runs the
+    reductions and a partial top-N selection. A RollupCube built on this dataset
+    answers directly when it covers the group columns and metrics.
     """
     missing_cols = [c for c in group_cols if c not in df.columns]
     if missing_cols:
@@ -35,7 +91,26 @@ def groupby_aggregate(
         if mcol not in df.columns:
             raise ValueError(f"Metric column not found: {mcol}")
 
-    out = df.groupby(group_cols, dropna=False).agg(metrics).reset_index()
+    if cube is not None and cube.serves(df):
+        table = cube.aggregate(group_cols, metrics)
+        if table is not None:
+            return table.iloc[_top_rows(table[next(iter(metrics))], top_n)].reset_index(drop=True)
+
+    if group_cols and len(df) and set(metrics.values()) <= SUPPORTED_AGGS and not set(metrics) & set(group_cols):
+        try:
+            index = get_group_index(df, group_cols)
+        except TypeError:
+            # keys that cannot be sorted together (mixed objects): pandas decides
+            index = None
+        if index is not None:
+            return _aggregate_with_index(df, index, metrics, top_n)
+
+    if is_columnar(df):
+        # only load the columns this aggregation touches
+        df = df[list(dict.fromkeys(list(group_cols) + list(metrics.keys())))]
+
+    # observed=True: category keys behave like object keys (no empty groups)
+    out = df.groupby(group_cols, dropna=False, observed=True).agg(metrics).reset_index()
 
     # Sort by first metric (if numeric)
     first_metric = next(iter(metrics.keys()))
@@ -44,29 +119,46 @@ def groupby_aggregate(
 
     return out.head(top_n)
 
-def outlier_summary_iqr(df: pd.DataFrame, cols: Optional[List[str]] = None) -> Dict[str, Any]:
-    num = df.select_dtypes(include=[np.number])
+def _outliers_iqr_approx(df, col, kll_k: int) -> Optional[Dict[str, Any]]:
+    """IQR fences from a KLL sketch (one pass), then an exact count against them (second pass)."""
+    kll = KLLSketch(k=kll_k)
+    for part in iter_column_batches(df, col):
+        kll.update(part.to_numpy(dtype="float64", na_value=np.nan))
+    if kll.n == 0:
+        return None
+    q1, q3 = kll.quantiles([0.25, 0.75])
+    iqr = q3 - q1
+    if iqr == 0:
+        return {"outliers": 0, "outlier_pct": 0.0, "rank_error": kll.rank_error()}
+    lower = q1 - 1.5 * iqr
+    upper = q3 + 1.5 * iqr
+    outliers = 0
+    for part in iter_column_batches(df, col):
+        v = part.to_numpy(dtype="float64", na_value=np.nan)
+        outliers += int(((v < lower) | (v > upper)).sum())
+    return {
+        "outliers": outliers,
+        "outlier_pct": float(outliers / kll.n),
+        "lower": float(lower),
+        "upper": float(upper),
+        # fences come from quantiles within this normalized rank of the true ones
+        "rank_error": kll.rank_error(),
+    }
+
+def outlier_summary_iqr(
+    df: pd.DataFrame,
+    cols: Optional[List[str]] = None,
+    approximate: bool = False,
+    kll_k: int = 200,
+    workers: Optional[int] = None,
+    profile: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """IQR outlier counts per numeric column (see core.outliers for other methods and row flags)."""
+    if not approximate:
+        return detect_outliers(df, cols, method="iqr", profile=profile, workers=workers)
+
+    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
     if cols is not None:
-        num = num[[c for c in cols if c in num.columns]]
-
-    res: Dict[str, Any] = {}
-    for col in num.columns:
-        s = num[col].dropna()
-        if s.empty:
-            continue
-        q1 = s.quantile(0.25)
-        q3 = s.quantile(0.75)
-        iqr = q3 - q1
-        if iqr == 0:
-            res[col] = {"outliers": 0, "outlier_pct": 0.0}
-            continue
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        outliers = int(((s < lower) | (s > upper)).sum())
-        res[col] = {
-            "outliers": outliers,
-            "outlier_pct": float(outliers / len(s)) if len(s) else 0.0,
-            "lower": float(lower),
-            "upper": float(upper),
-        }
-    return res
+        num_cols = [c for c in cols if c in num_cols]
+    found = {col: _outliers_iqr_approx(df, col, kll_k) for col in num_cols}
+    return {col: out for col, out in found.items() if out is not None}
@@ -0,0 +1,474 @@
+from __future__ import annotations
+import time
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.columnar import is_columnar
+from core.correlation import _empty_pairs, _merge, matrix_correlation_pairs, pairs_to_records
+from core.executor import get_executor
+from core.result_cache import dataset_state
+from core.sampling import uniform_positions
+
+# rows of the opt-in Kendall sample (kendall_pairs(max_rows=...)); exact runs use every row
+KENDALL_ROWS = 100_000
+# Cramér's V / correlation ratio tally contingency tables on at most this many rows.
+CATEGORICAL_ROWS = 100_000
+# categorical columns with more levels than this are skipped (mostly identifiers)
+MAX_LEVELS = 100
+
+def is_categorical(dtype) -> bool:
+    return (
+        isinstance(dtype, pd.CategoricalDtype)
+        or pd.api.types.is_bool_dtype(dtype)
+        or pd.api.types.is_object_dtype(dtype)
+        or pd.api.types.is_string_dtype(dtype)
+    )
+
+
+def _rank_values(s: pd.Series) -> np.ndarray:
+    r = s.rank(method="average").to_numpy(dtype=np.float64, na_value=np.nan)
+    # ranks are multiples of 0.5: float32 holds them exactly up to 2**23 rows
+    return r.astype(np.float32) if len(r) < 2 ** 23 else r
+
+
+class AssociationIndex:
+    """
+    Per-dataset-version inputs of the association measures: average ranks of numeric
+    columns, factorize codes of categorical ones and fixed row samples. Each is
+    computed on first use and shared by every pair and measure afterwards.
+    """
+
+    def __init__(self, df):
+        self._df = weakref.ref(df)
+        self.n_rows = int(len(df))
+        self._ranks: Dict[Any, np.ndarray] = {}
+        self._codes: Dict[Any, Tuple[np.ndarray, int]] = {}
+        self._samples: Dict[int, Optional[np.ndarray]] = {}
+
+    @property
+    def df(self):
+        df = self._df()
+        if df is None:
+            raise RuntimeError("The dataset for this association index no longer exists.")
+        return df
+
+    def ranks(self, col) -> np.ndarray:
+        """Average ranks (ties share their mean rank), NaN where missing."""
+        r = self._ranks.get(col)
+        if r is None:
+            r = self._ranks[col] = _rank_values(self.df[col])
+        return r
+
+    def order_values(self, col) -> np.ndarray:
+        """Cached ranks when available, else the raw values (same order, no sort needed)."""
+        r = self._ranks.get(col)
+        return r if r is not None else self.df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    def prepare_ranks(self, cols: List[Any], workers: Optional[int] = None) -> None:
+        """Rank the columns not cached yet, on the process pool when workers > 1."""
+        todo = [c for c in cols if c not in self._ranks]
+        if workers and workers > 1 and len(todo) > 1 and not is_columnar(self.df):
+            self._ranks.update(get_executor(workers).map_columns(self.df, todo, _rank_values))
+
+    def codes(self, col) -> Tuple[np.ndarray, int]:
+        """(factorize codes with -1 for missing, number of levels)."""
+        c = self._codes.get(col)
+        if c is None:
+            codes, uniques = pd.factorize(self.df[col])
+            c = (codes.astype(np.int64, copy=False), len(uniques))
+            self._codes[col] = c
+        return c
+
+    def sample(self, max_rows: int) -> Optional[np.ndarray]:
+        """Fixed uniform row positions, or None when every row fits."""
+        if self.n_rows <= max_rows:
+            return None
+        if max_rows not in self._samples:
+            self._samples[max_rows] = uniform_positions(self.n_rows, max_rows)
+        return self._samples[max_rows]
+
+
+_INDEXES: Dict[int, Tuple[weakref.ref, int, AssociationIndex]] = {}
+
+
+def get_association_index(df) -> AssociationIndex:
+    return dataset_state(df, _INDEXES, lambda: AssociationIndex(df))
+
+
+def _rows(values: np.ndarray, pos: Optional[np.ndarray]) -> np.ndarray:
+    return values if pos is None else values[pos]
+
+
+# ---- rank correlations ----
+
+def _spearman_task(ranks: np.ndarray, i: int, gappy: np.ndarray, floor: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    (rho, i, j) of column i (one with missing values) against the other columns, each
+    pair re-ranked on the rows where both are present (runs in a pool worker).
+    """
+    x = ranks[:, i]
+    x_ok = ~np.isnan(x)
+    vals, ii, jj = [], [], []
+    for j in range(ranks.shape[1]):
+        if j == i or (gappy[j] and j < i):
+            continue  # a pair of two gappy columns is done by the lower one
+        y = ranks[:, j]
+        ok = x_ok & ~np.isnan(y)
+        if ok.sum() < 2:
+            continue
+        rx = pd.Series(x[ok]).rank(method="average").to_numpy(dtype=np.float64)
+        ry = pd.Series(y[ok]).rank(method="average").to_numpy(dtype=np.float64)
+        rx -= rx.mean()
+        ry -= ry.mean()
+        den = np.sqrt((rx @ rx) * (ry @ ry))
+        if den == 0:
+            continue
+        rho = float(np.clip((rx @ ry) / den, -1.0, 1.0))
+        if abs(rho) >= floor:
+            vals.append(rho)
+            ii.append(min(i, j))
+            jj.append(max(i, j))
+    return np.asarray(vals, dtype=np.float64), np.asarray(ii, dtype=np.int64), np.asarray(jj, dtype=np.int64)
+
+
+def spearman_pairs(
+    df,
+    cols: List[Any],
+    k: Optional[int] = 10,
+    threshold: Optional[float] = None,
+    float32: bool = False,
+    workers: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Spearman's rho, pairwise-complete as in pandas. Pairs of columns without missing
+    values are Pearson r of the cached ranks on the blocked correlation engine; a pair
+    with a gappy column is re-ranked on the rows both columns have (one task per gappy
+    column on the process pool), since the cached ranks span each column's own values.
+    """
+    t0 = time.perf_counter()
+    idx = get_association_index(df)
+    idx.prepare_ranks(cols, workers)
+    gappy = np.array([bool(np.isnan(idx.ranks(c)).any()) for c in cols], dtype=bool)
+    full = np.flatnonzero(~gappy)
+    x = np.empty((idx.n_rows, len(full)), dtype=np.float64)
+    for j, c in enumerate(full):
+        x[:, j] = idx.ranks(cols[c])
+    full_cols = [cols[c] for c in full]
+    pairs, info = matrix_correlation_pairs(x, full_cols, k=k, threshold=threshold, float32=float32, workers=workers, t0=t0)
+    del x
+    if gappy.any():
+        at = {c: j for j, c in enumerate(cols)}
+        kept = (
+            np.array([r["corr"] for r in pairs], dtype=np.float64),
+            np.array([at[r["col1"]] for r in pairs], dtype=np.int64),
+            np.array([at[r["col2"]] for r in pairs], dtype=np.int64),
+        )
+        ranks = np.column_stack([idx.ranks(c) for c in cols])
+        floor = -1.0 if threshold is None else float(threshold)
+        tasks = np.flatnonzero(gappy).tolist()
+        for part in get_executor(workers if not is_columnar(df) else 1).map_array(ranks, _spearman_task, tasks, gappy, floor):
+            kept = _merge(kept, part, k)
+        pairs = pairs_to_records(kept, cols, cols)
+        n_gappy = int(gappy.sum())
+        info["reranked_pairs"] = n_gappy * (len(cols) - n_gappy) + n_gappy * (n_gappy - 1) // 2
+        info["seconds"] = float(time.perf_counter() - t0)
+    info["columns"] = len(cols)
+    info["pairs"] = len(cols) * (len(cols) - 1) // 2
+    info["rows_used"] = idx.n_rows
+    return pairs, info
+
+
+def _tied_pairs(sorted_values: np.ndarray, breaks: Optional[np.ndarray] = None) -> int:
+    """Pairs sharing a value in a sorted array (or sharing a run between `breaks`)."""
+    if breaks is None:
+        breaks = sorted_values[1:] != sorted_values[:-1]
+    runs = np.diff(np.concatenate(([0], np.flatnonzero(breaks) + 1, [len(sorted_values)])))
+    return int((runs * (runs - 1) // 2).sum())
+
+
+def _discordant(y: np.ndarray) -> Tuple[int, np.ndarray]:
+    """
+    (pairs i < j with y[i] > y[j], y sorted): bottom-up merge sort with one numpy pass
+    per level. Each level stable-sorts pairs of sorted runs; an element moved from the
+    right run to position q left the (source - q) larger elements of the left run behind.
+    """
+    n = len(y)
+    size = 1 << max(0, (n - 1).bit_length())
+    a = np.full(size, np.inf, dtype=y.dtype)
+    a[:n] = y
+    swaps = 0
+    width = 1
+    while width < size:
+        block = a.reshape(-1, 2 * width)
+        src = np.argsort(block, axis=1, kind="stable")
+        a = np.take_along_axis(block, src, axis=1).ravel()
+        src -= np.arange(2 * width)
+        np.maximum(src, 0, out=src)
+        swaps += int(src.sum())
+        width *= 2
+    return swaps, a[:n]
+
+
+def kendall_tau_b(x: np.ndarray, y: np.ndarray, order: Optional[np.ndarray] = None) -> float:
+    """
+    Kendall's tau-b of two rank arrays (no missing values) in O(n log n) (Knight, 1966):
+    rows sorted by (x, y), then discordant pairs counted as the swaps a merge sort of y
+    makes. `order`, a stable argsort of x, makes the (x, y) sort a nearly sorted one.
+    Ranks are positive multiples of 0.5, so (x, y) fits one exact float64 key below
+    about 6e7 rows (lexsort above).
+    """
+    n = len(x)
+    if n < 2:
+        return float("nan")
+    if order is None:
+        order = np.argsort(x, kind="stable")
+    xs, ys = x[order], y[order]
+    span = float(ys.max()) + 1.0
+    if float(xs[-1]) * span < 2.0 ** 51:
+        key = xs.astype(np.float64) * span + ys
+        by_xy = np.argsort(key, kind="stable")
+    else:
+        by_xy = np.lexsort((ys, xs))
+    xs, ys = xs[by_xy], ys[by_xy]
+    x_breaks = xs[1:] != xs[:-1]
+    n0 = n * (n - 1) // 2
+    n1 = _tied_pairs(xs, x_breaks)
+    n3 = _tied_pairs(xs, x_breaks | (ys[1:] != ys[:-1]))
+    swaps, y_sorted = _discordant(ys)
+    n2 = _tied_pairs(y_sorted)
+    if n1 == n0 or n2 == n0:
+        return float("nan")
+    tau = (n0 - n1 - n2 + n3 - 2 * swaps) / np.sqrt(float(n0 - n1) * float(n0 - n2))
+    return float(np.clip(tau, -1.0, 1.0))
+
+
+def _kendall_task(ranks: np.ndarray, i: int, floor: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(tau, i, j, rows used) of column i against every later column (runs in a pool worker)."""
+    x = ranks[:, i]
+    order = np.argsort(x, kind="stable")  # missing values sort last
+    x_ok = ~np.isnan(x[order])
+    vals, jj, used = [], [], []
+    for j in range(i + 1, ranks.shape[1]):
+        y = ranks[:, j]
+        ok = x_ok & ~np.isnan(y[order])
+        rows = order if ok.all() else order[ok]
+        # rows keeps x order, so it is the stable argsort of x[rows] itself
+        tau = kendall_tau_b(x[rows], y[rows], np.arange(len(rows)))
+        if not np.isnan(tau) and abs(tau) >= floor:
+            vals.append(tau)
+            jj.append(j)
+            used.append(len(rows))
+    return (
+        np.asarray(vals, dtype=np.float64),
+        np.full(len(jj), i, dtype=np.int64),
+        np.asarray(jj, dtype=np.int64),
+        np.asarray(used, dtype=np.int64),
+    )
+
+
+def kendall_pairs(
+    df,
+    cols: List[Any],
+    k: Optional[int] = 10,
+    threshold: Optional[float] = None,
+    max_rows: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Kendall's tau-b (pairwise-complete, as in pandas) of every column pair, each in
+    O(n log n) from the cached ranks (kendall_tau_b); one task per column on the
+    process pool when workers > 1. Exact on every row unless `max_rows` is given: then
+    data above that size runs on a fixed uniform sample and each pair also carries the
+    rows it used (`n`) and a standard error (`se`) from the bound
+    var(tau) <= 2 (1 - tau^2) / n (Daniels & Kendall, 1947).
+    """
+    t0 = time.perf_counter()
+    idx = get_association_index(df)
+    idx.prepare_ranks(cols, workers)
+    pos = idx.sample(max_rows) if max_rows else None
+    m = idx.n_rows if pos is None else len(pos)
+    info: Dict[str, Any] = {
+        "columns": len(cols),
+        "pairs": len(cols) * (len(cols) - 1) // 2,
+        "rows_used": m,
+        "total_rows": idx.n_rows,
+        "sampled": pos is not None,
+    }
+    kept = _empty_pairs()
+    n_used: Dict[Tuple[int, int], int] = {}
+    if len(cols) >= 2 and m >= 2:
+        ranks = np.column_stack([_rows(idx.ranks(c), pos) for c in cols])
+        floor = -1.0 if threshold is None else float(threshold)
+        tasks = list(range(len(cols) - 1))
+        parts = get_executor(workers if not is_columnar(df) else 1).map_array(ranks, _kendall_task, tasks, floor)
+        for vals, ii, jj, used in parts:
+            kept = _merge(kept, (vals, ii, jj), k)
+            n_used.update(zip(zip(ii.tolist(), jj.tolist()), used.tolist()))
+    records = pairs_to_records(kept, cols, cols)
+    if pos is not None:
+        at = {c: j for j, c in enumerate(cols)}
+        for r in records:
+            n = n_used[at[r["col1"]], at[r["col2"]]]
+            r["n"] = n
+            r["se"] = float(np.sqrt(2.0 * (1.0 - r["corr"] ** 2) / n))
+    info["seconds"] = float(time.perf_counter() - t0)
+    return records, info
+
+
+# ---- categorical associations ----
+
+def _levels(idx: AssociationIndex, cols: List[Any], pos: Optional[np.ndarray]) -> Dict[Any, Tuple[np.ndarray, int]]:
+    out = {}
+    for c in cols:
+        codes, n_levels = idx.codes(c)
+        if 2 <= n_levels <= MAX_LEVELS:
+            out[c] = (_rows(codes, pos), n_levels)
+    return out
+
+
+def cramers_v(a: np.ndarray, ka: int, b: np.ndarray, kb: int) -> float:
+    """Cramér's V of two code arrays (-1 = missing) over rows where both are present."""
+    both = (a >= 0) & (b >= 0)
+    table = np.bincount(a[both] * kb + b[both], minlength=ka * kb).reshape(ka, kb).astype(np.float64)
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+    r, c = table.shape
+    n = table.sum()
+    if min(r, c) < 2 or n == 0:
+        return float("nan")
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = float(((table - expected) ** 2 / expected).sum())
+    return float(np.sqrt(min(chi2 / n / (min(r, c) - 1), 1.0)))
+
+
+def cramers_v_pairs(
+    df,
+    cols: List[Any],
+    k: Optional[int] = 10,
+    threshold: Optional[float] = None,
+    max_rows: int = CATEGORICAL_ROWS,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Cramér's V between categorical columns (2..MAX_LEVELS levels) from bincount
+    contingency tables of the cached codes; on a fixed sample above `max_rows` rows.
+    """
+    t0 = time.perf_counter()
+    idx = get_association_index(df)
+    pos = idx.sample(max_rows)
+    levels = _levels(idx, cols, pos)
+    used = list(levels)
+    vals, ii, jj = [], [], []
+    for i in range(len(used)):
+        a, ka = levels[used[i]]
+        for j in range(i + 1, len(used)):
+            b, kb = levels[used[j]]
+            v = cramers_v(a, ka, b, kb)
+            if not np.isnan(v) and (threshold is None or v >= threshold):
+                vals.append(v)
+                ii.append(i)
+                jj.append(j)
+    kept = _merge(_empty_pairs(), (np.asarray(vals, dtype=np.float64), np.asarray(ii, dtype=np.int64), np.asarray(jj, dtype=np.int64)), k)
+    info = {
+        "columns": len(used),
+        "skipped_columns": [c for c in cols if c not in levels],
+        "pairs": len(used) * (len(used) - 1) // 2,
+        "rows_used": idx.n_rows if pos is None else len(pos),
+        "seconds": float(time.perf_counter() - t0),
+    }
+    return pairs_to_records(kept, used, used, key="value"), info
+
+
+def _one_hot(codes: np.ndarray, n_levels: int) -> np.ndarray:
+    """(rows x levels) 0/1 matrix; missing codes give an all-zero row."""
+    out = np.zeros((len(codes), n_levels))
+    valid = np.flatnonzero(codes >= 0)
+    out[valid, codes[valid]] = 1.0
+    return out
+
+
+def _eta(onehot: np.ndarray, y: np.ndarray, y2: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Correlation ratio of every column of `y` (0 where missing) against one categorical."""
+    g = onehot.T @ y
+    g2 = (onehot.T @ y2).sum(axis=0)
+    n = onehot.T @ present
+    total, count = g.sum(axis=0), n.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        grand = total * total / count
+        ss_total = g2 - grand
+        ss_between = (g * g / np.where(n > 0, n, 1.0)).sum(axis=0) - grand
+        eta = np.sqrt(np.clip(ss_between / ss_total, 0.0, 1.0))
+    eta[~(ss_total > 1e-12 * np.maximum(g2, 1e-300))] = np.nan
+    return eta
+
+
+def correlation_ratio_pairs(
+    df,
+    num_cols: List[Any],
+    cat_cols: List[Any],
+    k: Optional[int] = 10,
+    threshold: Optional[float] = None,
+    max_rows: int = CATEGORICAL_ROWS,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Correlation ratio eta (numeric vs categorical, 0..1): sqrt(between-group /
+    total sum of squares). Group sums of every numeric column against one
+    categorical are three matmuls with its one-hot code matrix; on a fixed sample
+    above `max_rows` rows.
+    """
+    t0 = time.perf_counter()
+    idx = get_association_index(df)
+    pos = idx.sample(max_rows)
+    levels = _levels(idx, cat_cols, pos)
+    used_cat = list(levels)
+    kept = _empty_pairs()
+    if num_cols and used_cat:
+        y = np.column_stack([
+            _rows(df[c].to_numpy(dtype=np.float64, na_value=np.nan), pos) for c in num_cols
+        ])
+        present = ~np.isnan(y)
+        # centre first so the sums of squares keep their precision
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(present, y, 0.0).sum(axis=0) / present.sum(axis=0)
+        y = np.where(present, y - np.nan_to_num(mean), 0.0)
+        y2 = y * y
+        present = present.astype(np.float64)
+        floor = -1.0 if threshold is None else float(threshold)
+        for ci, c in enumerate(used_cat):
+            eta = _eta(_one_hot(*levels[c]), y, y2, present)
+            with np.errstate(invalid="ignore"):
+                hit = np.flatnonzero(eta >= floor)
+            kept = _merge(kept, (eta[hit], hit, np.full(len(hit), ci, dtype=np.int64)), k)
+    info = {
+        "columns": len(num_cols) + len(used_cat),
+        "skipped_columns": [c for c in cat_cols if c not in levels],
+        "pairs": len(num_cols) * len(used_cat),
+        "rows_used": idx.n_rows if pos is None else len(pos),
+        "seconds": float(time.perf_counter() - t0),
+    }
+    return pairs_to_records(kept, num_cols, used_cat, key="value"), info
+
+
+def top_associations(
+    df,
+    method: str = "cramers_v",
+    top_n: Optional[int] = 10,
+    threshold: Optional[float] = None,
+    return_info: bool = False,
+):
+    """
+    Strongest categorical associations: "cramers_v" (category vs category) or
+    "correlation_ratio" (numeric vs category). Rank correlations go through
+    analyzer.top_correlations(method=...). Works on DataFrames and ColumnarDatasets.
+    """
+    dtypes = df.dtypes
+    cat_cols = [c for c in df.columns if is_categorical(dtypes[c])]
+    if method == "cramers_v":
+        results, info = cramers_v_pairs(df, cat_cols, k=top_n, threshold=threshold)
+    elif method == "correlation_ratio":
+        num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(dtypes[c]) and not pd.api.types.is_bool_dtype(dtypes[c])]
+        results, info = correlation_ratio_pairs(df, num_cols, cat_cols, k=top_n, threshold=threshold)
+    else:
+        raise ValueError(f"Unknown association method: {method}")
+    info["method"] = method
+    return (results, info) if return_info else results
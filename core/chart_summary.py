@@ -3,14 +3,29 @@ import pandas as pd
 import numpy as np
 from typing import Dict, Any, Optional
 
-def summarize_hist(df: pd.DataFrame, col: str) -> Dict[str, Any]:
+from core.histogram import histogram
+from core.visualizer import top_value_counts
+
+def summarize_hist(df: pd.DataFrame, col: str, hist: Optional[Dict[str, Any]] = None, scale: float = 1.0) -> Dict[str, Any]:
+    # scale: core.sampling.sample_scale of a sampled frame, so `count` estimates the full data
+    if hist is not None or pd.api.types.is_numeric_dtype(df.dtypes[col]):
+        # numeric columns: the stats of the shared histogram kernel (core.histogram)
+        stats = (hist if hist is not None else histogram(df, col))["stats"]
+        if not stats["count"]:
+            return {"type": "hist", "column": col, "note": "No non-null values."}
+        out = {"type": "hist", "column": col, **{k: stats[k] for k in ["count", "min", "max", "mean", "median", "std", "n_unique"]}}
+        out["count"] = int(round(out["count"] * scale))
+        if stats.get("non_finite"):
+            out["non_finite"] = int(round(stats["non_finite"] * scale))  # ±inf values, not binned
+        return out
+
     s = df[col].dropna()
     if s.empty:
         return {"type": "hist", "column": col, "note": "No non-null values."}
     return {
         "type": "hist",
         "column": col,
-        "count": int(s.shape[0]),
+        "count": int(round(s.shape[0] * scale)),
         "min": float(s.min()),
         "max": float(s.max()),
         "mean": float(s.mean()) if pd.api.types.is_numeric_dtype(s) else None,
@@ -19,29 +34,38 @@ def summarize_hist(df: pd.DataFrame, col: str) -> Dict[str, Any]:
         "n_unique": int(s.nunique()),
     }
 
-def summarize_topk_bar(df: pd.DataFrame, col: str, k: int = 20) -> Dict[str, Any]:
-    s = df[col].dropna().astype(str)
-    vc = s.value_counts().head(k)
-    top = [{"value": idx, "count": int(cnt)} for idx, cnt in vc.items()]
+def summarize_topk_bar(df: pd.DataFrame, col: str, k: int = 20, cube=None, scale: float = 1.0) -> Dict[str, Any]:
+    counts = top_value_counts(df, col, cube=cube)
+    vc = counts.head(k)
+    top = [{"value": idx, "count": int(round(cnt * scale))} for idx, cnt in vc.items()]
     return {
         "type": "topk_bar",
         "column": col,
         "top_k": k,
-        "distinct": int(s.nunique()),
+        "distinct": int(len(counts)),
         "top_values": top,
     }
 
-def summarize_scatter(df: pd.DataFrame, x: str, y: str) -> Dict[str, Any]:
+def summarize_scatter(df: pd.DataFrame, x: str, y: str, density: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    if density is not None:
+        # density-mode scatter: stats come from the same pass that binned the raster
+        if not density["n_points"]:
+            return {"type": "scatter", "x": x, "y": y, "note": "No valid pairs.", **density.get("stats", {})}
+        return {"type": "scatter", "x": x, "y": y, "n_points": density["n_points"], **density["stats"], "density": density["density"]}
     d = df[[x, y]].dropna()
     if d.empty:
         return {"type": "scatter", "x": x, "y": y, "note": "No valid pairs."}
-    corr = float(d[x].corr(d[y])) if d[x].std() and d[y].std() else None
+    varies = bool(d[x].std() and d[y].std())
+    corr = float(d[x].corr(d[y])) if varies else None
+    # rank correlation: monotone but non-linear relations show up here, not in `corr`
+    spearman = float(d[x].rank().corr(d[y].rank())) if varies else None
     return {
         "type": "scatter",
         "x": x,
         "y": y,
         "n_points": int(len(d)),
         "corr": corr,
+        "spearman": spearman,
         "x_min": float(d[x].min()),
         "x_max": float(d[x].max()),
         "y_min": float(d[y].min()),
@@ -49,7 +73,7 @@ def summarize_scatter(df: pd.DataFrame, x: str, y: str) -> Dict[str, Any]:
     }
 
 def summarize_timeseries(ts_index, ts_values, value_col: str, agg: str, freq: str) -> Dict[str, Any]:
-    # expects already-aggregated series from visualizer (if you want)
+    # expects already-aggregated series (core.timeseries: the same one the chart draws)
     s = pd.Series(ts_values, index=pd.to_datetime(ts_index))
     s = s.dropna()
     if s.empty:
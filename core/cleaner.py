@@ -1,24 +1,82 @@
 from __future__ import annotations
+import functools
 import pandas as pd
 import numpy as np
 from typing import Optional, List, Literal, Dict, Any
 
+from core.columnar import is_columnar
+from core.fingerprint import get_fingerprints
+from core.profiler import count_missing
+from core.result_cache import bump_version
+
 NumericFill = Literal["mean", "median", "min", "max"]
 CatFill = Literal["mode"]
 DropNAHow = Literal["any", "all", "thresh"]
 KeepDup = Literal["first", "last", False]
 
+# Cleaning functions can also return a change description (return_change=True) that
+# core.profiler.update_profile uses to patch an existing profile:
+#   {"op": "fill_missing", "filled": {col: cells_filled}, "values": {col: fill_value}}
+#   {"op": "drop_rows", "rows_dropped": n, "missing_dropped": {col: n}, "duplicates_cleared": bool}
+Change = Dict[str, Any]
+
+def _drop_change(before, mask: Optional[np.ndarray], after, duplicates_cleared: bool = False) -> Change:
+    """Describe a row drop; `mask` marks kept rows (DataFrame) or is None (columnar)."""
+    if mask is None:
+        nb, na = before.null_counts(), after.null_counts()
+        missing_dropped = {c: int(nb[c] - na[c]) for c in nb}
+    else:
+        missing_dropped = {c: int(v) for c, v in before[~mask].isna().sum().items()}
+    return {
+        "op": "drop_rows",
+        "rows_dropped": int(len(before) - len(after)),
+        "missing_dropped": missing_dropped,
+        "duplicates_cleared": duplicates_cleared,
+    }
+
+def _bumps_version(fn):
+    """The cleaned dataset gets a new version, so cached results of the input are not reused for it."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        result = fn(*args, **kwargs)
+        bump_version(result[0] if isinstance(result, tuple) else result)
+        return result
+    return wrapper
+
+def _fill_kind(dtype) -> Optional[str]:
+    """
+    How fill_missing treats a column: "numeric" (numeric fill), "categorical" (mode) or
+    None (left alone). Bool columns are categorical: with gaps they are object columns
+    in memory but keep a bool schema out of core, and a mean is no bool anyway.
+    """
+    if pd.api.types.is_bool_dtype(dtype) or dtype == "object" or str(dtype) == "category" or str(dtype).startswith("string"):
+        return "categorical"
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "numeric"
+    return None
+
+@_bumps_version
 def fill_missing(
     df: pd.DataFrame,
     numeric: NumericFill = "mean",
     categorical: CatFill = "mode",
     columns: Optional[List[str]] = None,
-) -> pd.DataFrame:
+    return_change: bool = False,
+):
+    if is_columnar(df):
+        out, vals = _fill_missing_columnar(df, numeric, categorical, columns)
+        if return_change:
+            nb, na = df.null_counts(), out.null_counts()
+            filled = {c: int(nb[c] - na[c]) for c in nb if nb[c] != na[c]}
+            return out, {"op": "fill_missing", "filled": filled, "values": {c: vals[c] for c in filled}}
+        return out
+
     out = df.copy()
     cols = columns if columns else out.columns.tolist()
+    used: Dict[str, Any] = {}
 
     # numeric
-    num_cols = [c for c in cols if c in out.columns and pd.api.types.is_numeric_dtype(out[c])]
+    num_cols = [c for c in cols if c in out.columns and _fill_kind(out[c].dtype) == "numeric"]
     if num_cols:
         if numeric == "mean":
             vals = out[num_cols].mean(numeric_only=True)
@@ -29,38 +87,100 @@ def fill_missing(
         elif numeric == "max":
             vals = out[num_cols].max(numeric_only=True)
         out[num_cols] = out[num_cols].fillna(vals)
+        used.update(vals.items())
 
     # categorical
-    cat_cols = [c for c in cols if c in out.columns and (out[c].dtype == "object" or str(out[c].dtype) == "category" or str(out[c].dtype) == "bool")]
+    cat_cols = [c for c in cols if c in out.columns and _fill_kind(out[c].dtype) == "categorical"]
     if cat_cols and categorical == "mode":
         for c in cat_cols:
             s = out[c]
             mode_vals = s.mode(dropna=True)
             if len(mode_vals) > 0:
                 out[c] = s.fillna(mode_vals.iloc[0])
+                used[c] = mode_vals.iloc[0]
 
+    if return_change:
+        filled = {}
+        for c in dict.fromkeys(num_cols + cat_cols):
+            n = int(df[c].isna().sum() - out[c].isna().sum())
+            if n:
+                filled[c] = n
+        return out, {"op": "fill_missing", "filled": filled, "values": {c: used[c] for c in filled}}
     return out
 
-def drop_missing_rows(df: pd.DataFrame, how: DropNAHow = "any", thresh: Optional[int] = None) -> pd.DataFrame:
+def _fill_missing_columnar(ds, numeric: NumericFill, categorical: CatFill, columns: Optional[List[str]]):
+    """
+    fill_missing for a ColumnarDataset (and the fill values used): fill values come from
+    one column at a time, columns classified by _fill_kind as in memory.
+    """
+    cols = columns if columns else ds.columns.tolist()
+    dtypes = ds.dtypes
+    vals: Dict[str, Any] = {}
+    for c in cols:
+        if c not in dtypes.index:
+            continue
+        kind = _fill_kind(dtypes[c])
+        if kind == "numeric":
+            v = getattr(ds[c], numeric)()
+            if pd.notna(v):
+                vals[c] = v
+        elif categorical == "mode" and kind == "categorical":
+            mode_vals = ds[c].mode(dropna=True)
+            if len(mode_vals) > 0:
+                vals[c] = mode_vals.iloc[0]
+    return ds.map_batches(lambda batch, _: batch.fillna(vals)), vals
+
+@_bumps_version
+def drop_missing_rows(
+    df: pd.DataFrame,
+    how: DropNAHow = "any",
+    thresh: Optional[int] = None,
+    return_change: bool = False,
+):
+    if how == "thresh" and thresh is None:
+        raise ValueError("thresh is required when how='thresh'")
+    kw = {"thresh": thresh} if how == "thresh" else {"how": how}
+
+    if is_columnar(df):
+        out = df.map_batches(lambda batch, _: batch.dropna(**kw))
+        return (out, _drop_change(df, None, out)) if return_change else out
+    if not return_change:
+        return df.dropna(**kw)
+
+    # same selection as dropna, keeping the mask to describe the dropped rows
+    notna = df.notna()
     if how == "thresh":
-        if thresh is None:
-            raise ValueError("thresh is required when how='thresh'")
-        return df.dropna(thresh=thresh)
-    return df.dropna(how=how)
+        mask = (notna.sum(axis=1) >= thresh).to_numpy()
+    elif how == "all":
+        mask = notna.any(axis=1).to_numpy()
+    else:
+        mask = notna.all(axis=1).to_numpy()
+    out = df[mask]
+    return out, _drop_change(df, mask, out)
 
+@_bumps_version
 def drop_duplicates_rows(
     df: pd.DataFrame,
     subset: Optional[List[str]] = None,
     keep: KeepDup = "first",
-) -> pd.DataFrame:
+    return_change: bool = False,
+):
     subset = subset if subset and len(subset) > 0 else None
-    return df.drop_duplicates(subset=subset, keep=keep)
+    dup = get_fingerprints(df).duplicated(subset, keep=keep)
+    if is_columnar(df):
+        out = df.map_batches(lambda batch, offset: batch[~dup[offset:offset + len(batch)]])
+        return (out, _drop_change(df, None, out, duplicates_cleared=subset is None)) if return_change else out
+    mask = ~dup
+    out = df[mask]
+    if not return_change:
+        return out
+    return out, _drop_change(df, mask, out, duplicates_cleared=subset is None)
 
 def summarize_cleaning(before: pd.DataFrame, after: pd.DataFrame) -> Dict[str, Any]:
     return {
         "rows_before": int(before.shape[0]),
         "rows_after": int(after.shape[0]),
         "dropped_rows": int(before.shape[0] - after.shape[0]),
-        "missing_cells_before": int(before.isna().sum().sum()),
-        "missing_cells_after": int(after.isna().sum().sum()),
+        "missing_cells_before": count_missing(before),
+        "missing_cells_after": count_missing(after),
     }
@@ -0,0 +1,267 @@
+from __future__ import annotations
+import os
+import time
+import uuid
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Iterable, Iterator, Callable, Union, Tuple
+
+from core.dataset_cache import content_key
+from core.fingerprint import get_fingerprints
+from core.loader import _iter_csv_chunks, DEFAULT_CHUNK_ROWS, DEFAULT_SAMPLE_ROWS, ProgressFn, ExcelWorkbook
+
+DEFAULT_OOC_DIR = os.path.join("artifacts", "cache", "ooc")
+DEFAULT_BATCH_ROWS = 250_000
+
+
+def _write_ipc(frames: Iterable[pd.DataFrame], path: str, schema=None) -> None:
+    """Write pandas chunks to an uncompressed Arrow IPC file (atomic rename at the end)."""
+    import pyarrow as pa
+
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"  # unique per writer: sessions share the process
+    writer = None
+    done = False
+    try:
+        for chunk in frames:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pa.ipc.new_file(tmp, schema)
+            elif not table.schema.equals(schema, check_metadata=False):
+                try:
+                    table = table.cast(schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                    raise ValueError(
+                        f"Chunk schema does not match the first chunk ({e}). "
+                        "Increase the dtype sample size or load the dataset in memory."
+                    ) from e
+            writer.write_table(table, max_chunksize=DEFAULT_BATCH_ROWS)
+        if writer is None:
+            if schema is None:
+                raise ValueError("No data to write.")
+            writer = pa.ipc.new_file(tmp, schema)
+        done = True
+    finally:
+        if writer is not None:
+            writer.close()
+        if not done and os.path.exists(tmp):
+            os.remove(tmp)
+    os.replace(tmp, path)
+
+
+class ColumnarDataset:
+    """
+    A dataset kept in a memory-mapped Arrow IPC file instead of RAM.
+
+    It exposes the small DataFrame surface the pages use (`shape`, `columns`, `dtypes`,
+    `select_dtypes`, `head`, `df[col]`, `df[[cols]]`); indexing materialises only the
+    requested columns. Whole-frame work (missing counts, duplicates, correlations)
+    runs column-by-column or in row batches. `select_dtypes` returns a zero-row frame:
+    use it for column names only.
+    """
+
+    def __init__(self, path: str):
+        import pyarrow.feather as feather
+
+        self.path = path
+        self.derived = False  # set by derive(): a session's cleaning output, not the shared upload file
+        self._table = feather.read_table(path, memory_map=True)
+        self._schema_frame = self._table.schema.empty_table().to_pandas()
+
+    # ---- constructors ----
+    @classmethod
+    def from_frames(cls, frames: Iterable[pd.DataFrame], path: str, schema=None) -> "ColumnarDataset":
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _write_ipc(frames, path, schema=schema)
+        return cls(path)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, path: str) -> "ColumnarDataset":
+        return cls.from_frames([df], path)
+
+    @classmethod
+    def from_csv(
+        cls,
+        uploaded_file,
+        path: str,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        sample_rows: int = DEFAULT_SAMPLE_ROWS,
+        progress: Optional[ProgressFn] = None,
+    ) -> "ColumnarDataset":
+        """Stream a CSV to disk one chunk at a time (numeric columns stored as float64)."""
+        chunks = _iter_csv_chunks(uploaded_file, chunk_rows, sample_rows, progress, numeric_as_float=True)
+        return cls.from_frames(chunks, path)
+
+    def derive(self, frames: Iterable[pd.DataFrame]) -> "ColumnarDataset":
+        """New dataset next to this one, built from transformed batches."""
+        stem = os.path.splitext(os.path.basename(self.path))[0].split("-")[0]
+        path = os.path.join(os.path.dirname(self.path), f"{stem}-{uuid.uuid4().hex[:8]}.arrow")
+        ds = ColumnarDataset.from_frames(frames, path, schema=self._table.schema)
+        ds.derived = True
+        return ds
+
+    def discard(self) -> None:
+        """
+        Delete the file of a derived dataset once the session has moved on from it. The
+        memory map stays readable for anything still holding this object; the
+        content-keyed upload file is never deleted (other sessions re-open it).
+        """
+        if not self.derived:
+            return
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass  # already gone, or still open where files cannot be unlinked (Windows)
+
+    # ---- DataFrame-like surface ----
+    @property
+    def shape(self):
+        return (int(self._table.num_rows), int(self._table.num_columns))
+
+    @property
+    def columns(self) -> pd.Index:
+        return self._schema_frame.columns
+
+    @property
+    def dtypes(self) -> pd.Series:
+        return self._schema_frame.dtypes
+
+    @property
+    def empty(self) -> bool:
+        return self._table.num_rows == 0 or self._table.num_columns == 0
+
+    def __len__(self) -> int:
+        return int(self._table.num_rows)
+
+    def select_dtypes(self, include=None, exclude=None) -> pd.DataFrame:
+        return self._schema_frame.select_dtypes(include=include, exclude=exclude)
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        return self._table.slice(0, n).to_pandas()
+
+    def __getitem__(self, key: Union[str, List[str]]):
+        if isinstance(key, str):
+            return self._table.select([key]).to_pandas()[key]
+        return self._table.select(list(key)).to_pandas()
+
+    def take(self, positions) -> pd.DataFrame:
+        """Materialise the given row positions (all columns) as a DataFrame."""
+        return self._table.take(np.asarray(positions)).to_pandas()
+
+    # ---- column / batch access ----
+    def iter_batches(self, columns: Optional[List[str]] = None, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pd.DataFrame]:
+        table = self._table.select(list(columns)) if columns is not None else self._table
+        for offset in range(0, table.num_rows, batch_rows):
+            yield table.slice(offset, batch_rows).to_pandas()
+
+    def map_batches(self, fn: Callable[[pd.DataFrame, int], pd.DataFrame]) -> "ColumnarDataset":
+        """Apply fn(batch, row_offset) to every row batch and write the result as a new dataset."""
+        def gen():
+            offset = 0
+            for batch in self.iter_batches():
+                yield fn(batch, offset)
+                offset += len(batch)
+        return self.derive(gen())
+
+    def null_counts(self) -> Dict[str, int]:
+        # Arrow keeps per-array null counts, so this never touches the values
+        return {name: int(self._table.column(name).null_count) for name in self.columns}
+
+    def duplicated(self, subset: Optional[List[str]] = None, keep="first") -> np.ndarray:
+        """Duplicate-row mask from the dataset's fingerprint index (verified row hashes)."""
+        return get_fingerprints(self).duplicated(subset, keep=keep)
+
+    def corr(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Pairwise Pearson correlation (pandas semantics: each pair uses the rows where
+        both values are present), accumulated over row batches from shifted sums.
+        """
+        if columns is None:
+            columns = self.select_dtypes(include=[np.number]).columns.tolist()
+        p = len(columns)
+        if p == 0:
+            return pd.DataFrame()
+
+        # shift by the column means to keep the sums well conditioned
+        shift = np.array([self[c].mean() for c in columns], dtype=float)
+        shift = np.nan_to_num(shift)
+
+        n = np.zeros((p, p))
+        sx = np.zeros((p, p))
+        sxx = np.zeros((p, p))
+        sxy = np.zeros((p, p))
+        for batch in self.iter_batches(columns=columns):
+            x = batch.to_numpy(dtype=float) - shift
+            m = ~np.isnan(x)
+            x = np.where(m, x, 0.0)
+            mf = m.astype(float)
+            n += mf.T @ mf
+            sx += x.T @ mf
+            sxx += (x * x).T @ mf
+            sxy += x.T @ x
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = sxy - sx * sx.T / n
+            var_i = sxx - sx * sx / n
+            var_j = var_i.T
+            corr = cov / np.sqrt(var_i * var_j)
+        corr[(var_i <= 0) | (var_j <= 0) | (n < 1)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def is_columnar(df) -> bool:
+    return isinstance(df, ColumnarDataset)
+
+
+def iter_column_batches(df, col, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pd.Series]:
+    """One column in row batches, from a DataFrame or a ColumnarDataset."""
+    if is_columnar(df):
+        for batch in df.iter_batches(columns=[col], batch_rows=batch_rows):
+            yield batch[col]
+        return
+    s = df[col]
+    for offset in range(0, len(s), batch_rows):
+        yield s.iloc[offset:offset + batch_rows]
+
+
+def ooc_path(key: str, root: str = DEFAULT_OOC_DIR) -> str:
+    return os.path.join(root, f"{key}.arrow")
+
+
+def load_columnar(
+    uploaded_file,
+    sheet_name: Optional[str] = None,
+    progress: Optional[ProgressFn] = None,
+    workbook: Optional[ExcelWorkbook] = None,
+    root: str = DEFAULT_OOC_DIR,
+) -> Tuple[ColumnarDataset, Dict[str, Any]]:
+    """
+    Out-of-core counterpart of load_dataframe: returns (dataset, meta).
+    The file is keyed by content hash, so re-opening the same upload is a memory-map.
+    CSVs are streamed to disk; Excel sheets are parsed once and written out.
+    """
+    t0 = time.perf_counter()
+    path = ooc_path(content_key(uploaded_file, sheet_name), root)
+    name = uploaded_file.name.lower()
+
+    if name.endswith(".csv"):
+        meta: Dict[str, Any] = {"file_type": "csv", "sheet": None}
+        build = lambda: ColumnarDataset.from_csv(uploaded_file, path, progress=progress)
+    elif name.endswith(".xlsx") or name.endswith(".xls"):
+        book = workbook or ExcelWorkbook(uploaded_file)
+        chosen = sheet_name or book.sheet_names[0]
+        meta = {"file_type": "excel", "sheet": chosen, "sheets": book.sheet_names}
+        build = lambda: ColumnarDataset.from_frame(book.sheet(chosen), path)
+    else:
+        raise ValueError("Unsupported file type. Please upload a CSV or Excel file.")
+
+    if os.path.exists(path):
+        ds = ColumnarDataset(path)
+        meta["cache"] = "hit"
+    else:
+        ds = build()
+        meta["cache"] = "miss"
+    meta["mode"] = "out-of-core"
+    meta["load_seconds"] = float(time.perf_counter() - t0)
+    return ds, meta
@@ -0,0 +1,77 @@
+from __future__ import annotations
+import pandas as pd
+import numpy as np
+from typing import Dict, Any, Tuple
+
+
+def _col_bytes(s: pd.Series) -> int:
+    return int(s.memory_usage(deep=True, index=False))
+
+
+def _is_pure_text(s: pd.Series) -> bool:
+    # mixed columns (e.g. 1 and "1") would merge values once converted to strings
+    return pd.api.types.infer_dtype(s, skipna=True) in ("string", "empty")
+
+
+def _compact_series(s: pd.Series, max_category_ratio: float, arrow_strings: bool) -> pd.Series:
+    dtype = s.dtype
+
+    if dtype == "object":
+        if not _is_pure_text(s):
+            return s
+        n = int(s.notna().sum())
+        if n and s.nunique(dropna=True) / n <= max_category_ratio:
+            return s.astype("category")
+        if arrow_strings:
+            return s.astype("string[pyarrow]")
+        return s
+
+    # Only signed integers are downcast: pandas reduces small ints in int64 (same
+    # results), but reduces float32 in single precision, which would change means/stds,
+    # and unsigned types would wrap on differences such as a series trend.
+    if pd.api.types.is_signed_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        return pd.to_numeric(s, downcast="integer")
+
+    return s
+
+
+def compact_dataframe(
+    df: pd.DataFrame,
+    max_category_ratio: float = 0.5,
+    arrow_strings: bool = False,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Shrink a loaded frame without changing its values:
+    - text columns with at most `max_category_ratio` distinct values per non-null row -> category
+    - other text columns -> Arrow-backed strings (if `arrow_strings`)
+    - int64 columns -> the smallest integer type that holds their range
+    Returns (compacted_df, report) with before/after bytes per column.
+    """
+    out = df.copy(deep=False)
+    columns: Dict[str, Any] = {}
+    total_before = 0
+    total_after = 0
+
+    for col in df.columns:
+        s = df[col]
+        before = _col_bytes(s)
+        new = _compact_series(s, max_category_ratio, arrow_strings) if len(s) else s
+        after = _col_bytes(new) if new is not s else before
+        if new is not s:
+            out[col] = new
+
+        total_before += before
+        total_after += after
+        columns[str(col)] = {
+            "dtype_before": str(s.dtype),
+            "dtype_after": str(new.dtype),
+            "bytes_before": before,
+            "bytes_after": after,
+        }
+
+    return out, {
+        "bytes_before": int(total_before),
+        "bytes_after": int(total_after),
+        "saved_pct": float(1 - total_after / total_before) if total_before else 0.0,
+        "columns": columns,
+    }
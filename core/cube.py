@@ -0,0 +1,174 @@
+from __future__ import annotations
+import itertools
+import time
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.group_index import SUPPORTED_AGGS, get_group_index
+from core.result_cache import dataset_version
+
+# partial aggregates kept per measure; mean = sum / count
+PARTIALS = ("sum", "count", "min", "max")
+# finest-grain groups above this are refused (the cube would be about as large as the data)
+MAX_GROUPS = 1_000_000
+_ROWS = "__rows"
+_FIRST = "__first"
+
+
+def _col(measure, partial: str) -> str:
+    return f"{measure}__{partial}"
+
+
+def _rollup(cuboid: pd.DataFrame, keys: List[Any], measures: List[Any]) -> pd.DataFrame:
+    """
+    Coarser cuboid from a finer one: partials combine (sum of sums, min of mins, ...).
+    Keys that do not compare (mixed object types) keep first-appearance order, as in
+    core.group_index.
+    """
+    how = {_ROWS: "sum", _FIRST: "min"}
+    for m in measures:
+        how.update({_col(m, "sum"): "sum", _col(m, "count"): "sum", _col(m, "min"): "min", _col(m, "max"): "max"})
+    try:
+        out = cuboid.groupby(keys, dropna=False, observed=True, sort=True).agg(how)
+    except TypeError:
+        out = cuboid.groupby(keys, dropna=False, observed=True, sort=False).agg(how)
+    return out.reset_index()
+
+
+class RollupCube:
+    """
+    Materialized sum/count/min/max partials of `measures` for every non-empty subset
+    of `dims` (the finest cuboid is built from the dataset's GroupIndex, coarser ones
+    are rolled up from it). Bound to one dataset version: serves() is False once the
+    data changes, and update_cube() carries it over to the cleaned data.
+    """
+
+    def __init__(self, df, dims: List[Any], measures: List[Any], cuboids: Dict[Tuple, pd.DataFrame], seconds: float = 0.0):
+        self.dims = list(dims)
+        self.measures = list(measures)
+        self.cuboids = cuboids
+        self.seconds = seconds
+        self._df = weakref.ref(df)
+        self.version = dataset_version(df)
+
+    def serves(self, df) -> bool:
+        return self._df() is df and dataset_version(df) == self.version
+
+    @property
+    def n_groups(self) -> int:
+        return int(len(self.cuboids[tuple(self.dims)]))
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(c.memory_usage(deep=True, index=True).sum() for c in self.cuboids.values()))
+
+    def _cuboid(self, group_cols: List[Any]) -> Optional[pd.DataFrame]:
+        if not group_cols or len(set(group_cols)) != len(group_cols) or not set(group_cols) <= set(self.dims):
+            return None
+        key = tuple(d for d in self.dims if d in group_cols)
+        cuboid = self.cuboids[key]
+        if list(key) != list(group_cols):
+            # same groups, ordered by the requested key order
+            cuboid = _rollup(cuboid, list(group_cols), self.measures)
+        return cuboid
+
+    def aggregate(self, group_cols: List[Any], metrics: Dict[Any, str]) -> Optional[pd.DataFrame]:
+        """
+        Every group with its metrics, in groupby's key order, as
+        df.groupby(group_cols, dropna=False, observed=True).agg(metrics) would give;
+        None when the cube cannot answer (other columns or aggregations).
+        """
+        if not set(metrics) <= set(self.measures) or not set(metrics.values()) <= SUPPORTED_AGGS:
+            return None
+        cuboid = self._cuboid(list(group_cols))
+        if cuboid is None:
+            return None
+        out = cuboid[list(group_cols)].copy()
+        for m, agg in metrics.items():
+            if agg == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    count = cuboid[_col(m, "count")].to_numpy(dtype=np.float64)
+                    out[m] = cuboid[_col(m, "sum")].to_numpy(dtype=np.float64) / np.where(count > 0, count, np.nan)
+            else:
+                out[m] = cuboid[_col(m, agg)].to_numpy()
+        return out
+
+    def value_counts(self, col) -> Optional[pd.Series]:
+        """Non-missing value -> row count, in first-appearance order (like value_counts before sorting)."""
+        cuboid = self._cuboid([col])
+        if cuboid is None:
+            return None
+        cuboid = cuboid[cuboid[col].notna()].sort_values(_FIRST, kind="stable")
+        return pd.Series(cuboid[_ROWS].to_numpy(), index=pd.Index(cuboid[col].to_numpy(), name=col))
+
+
+def build_cube(df, dims: List[Any], measures: Optional[List[Any]] = None, max_groups: int = MAX_GROUPS) -> RollupCube:
+    """Build the cube over `dims` (default measures: every numeric column that is not a dimension)."""
+    t0 = time.perf_counter()
+    dims = list(dict.fromkeys(dims))
+    if not dims:
+        raise ValueError("Select at least one dimension column.")
+    missing = [c for c in dims if c not in df.columns]
+    if missing:
+        raise ValueError(f"Dimension columns not found: {missing}")
+    if measures is None:
+        dtypes = df.dtypes
+        measures = [
+            c for c in df.columns
+            if c not in dims and pd.api.types.is_numeric_dtype(dtypes[c]) and not pd.api.types.is_bool_dtype(dtypes[c])
+        ]
+
+    index = get_group_index(df, dims)
+    if index.n_groups > max_groups:
+        raise ValueError(f"{index.n_groups:,} groups over {dims}: too many for a cube (limit {max_groups:,}).")
+    finest = index.keys(df, np.arange(index.n_groups))
+    finest[_ROWS] = np.bincount(index.ids, minlength=index.n_groups).astype(np.int64)
+    finest[_FIRST] = index.first
+    for m in measures:
+        values = df[m]
+        for partial in PARTIALS:
+            finest[_col(m, partial)] = index.reduce(values, partial).to_numpy()
+
+    cuboids = {tuple(dims): finest}
+    for size in range(len(dims) - 1, 0, -1):
+        for keys in itertools.combinations(dims, size):
+            cuboids[keys] = _rollup(finest, list(keys), measures)
+    return RollupCube(df, dims, measures, cuboids, seconds=float(time.perf_counter() - t0))
+
+
+def update_cube(cube: RollupCube, after, change: Dict[str, Any]) -> RollupCube:
+    """
+    The cube for `after`, the result of a cleaning step described by `change`.
+    Filling missing values of measures (not dimensions) with known fill values is
+    applied to the partials in place of a rebuild; every other change (dropped
+    rows, filled dimensions) rebuilds the cube from `after`.
+    """
+    filled = change.get("filled", {}) if change.get("op") == "fill_missing" else None
+    values = change.get("values", {})
+    incremental = (
+        filled is not None
+        and not set(filled) & set(cube.dims)
+        and all(c in values for c in filled if c in cube.measures)
+        and len(after) == cube.cuboids[tuple(cube.dims)][_ROWS].sum()
+    )
+    if not incremental:
+        return build_cube(after, cube.dims, [m for m in cube.measures if m in after.columns])
+
+    t0 = time.perf_counter()
+    cuboids = {}
+    for key, cuboid in cube.cuboids.items():
+        cuboid = cuboid.copy()
+        for m in (c for c in filled if c in cube.measures):
+            v = float(values[m])
+            count = cuboid[_col(m, "count")].to_numpy()
+            gap = cuboid[_ROWS].to_numpy() - count
+            # every missing cell of the column got `v`
+            cuboid[_col(m, "sum")] = cuboid[_col(m, "sum")].to_numpy() + v * gap
+            cuboid[_col(m, "count")] = count + gap
+            hit = gap > 0
+            cuboid[_col(m, "min")] = np.where(hit, np.fmin(cuboid[_col(m, "min")].to_numpy(dtype=np.float64), v), cuboid[_col(m, "min")])
+            cuboid[_col(m, "max")] = np.where(hit, np.fmax(cuboid[_col(m, "max")].to_numpy(dtype=np.float64), v), cuboid[_col(m, "max")])
+        cuboids[key] = cuboid
+    return RollupCube(after, cube.dims, cube.measures, cuboids, seconds=float(time.perf_counter() - t0))
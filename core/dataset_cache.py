@@ -0,0 +1,124 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import uuid
+import pandas as pd
+from typing import Optional, Dict, Any, List, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join("artifacts", "cache", "datasets")
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+_HASH_BLOCK = 8 * 1024 * 1024
+_META_KEY = b"dataassist_meta"
+
+
+def content_key(uploaded_file, sheet_name: Optional[str] = None) -> str:
+    """Hash of the uploaded bytes (plus sheet name), read in blocks."""
+    h = hashlib.blake2b(digest_size=20)
+    uploaded_file.seek(0)
+    while True:
+        block = uploaded_file.read(_HASH_BLOCK)
+        if not block:
+            break
+        h.update(block)
+    uploaded_file.seek(0)
+    h.update(f"::sheet={sheet_name or ''}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class DatasetCache:
+    """
+    On-disk cache of parsed frames stored as uncompressed Arrow IPC (Feather v2),
+    so a hit is a memory-map instead of a CSV/XLSX parse.
+    Entries are evicted least-recently-used first once the directory exceeds
+    `max_bytes`; recency is tracked through file mtimes so it survives restarts.
+    """
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.arrow")
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        import pyarrow.feather as feather
+
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except Exception:
+            # truncated/corrupt entry: drop it and treat as a miss
+            self._remove(path)
+            return None
+        os.utime(path, None)
+        raw = (table.schema.metadata or {}).get(_META_KEY)
+        meta = json.loads(raw) if raw else {}
+        return table.to_pandas(), meta
+
+    def put(self, key: str, df: pd.DataFrame, meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Store df (and its loader meta); returns False if it cannot be represented in Arrow."""
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"  # unique per writer: sessions share the process
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            schema_meta = dict(table.schema.metadata or {})
+            schema_meta[_META_KEY] = json.dumps(meta or {}, default=str).encode("utf-8")
+            table = table.replace_schema_metadata(schema_meta)
+            feather.write_feather(table, tmp, compression="uncompressed")
+        except (pa.ArrowException, ValueError, TypeError):
+            self._remove(tmp)
+            return False
+        os.replace(tmp, path)
+        self.evict()
+        return True
+
+    def entries(self) -> List[Tuple[str, int, float]]:
+        """(path, size, last_used) for every cached dataset, oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        out = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".arrow"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((path, int(st.st_size), float(st.st_mtime)))
+        return sorted(out, key=lambda e: e[2])
+
+    def evict(self) -> int:
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self.entries()
+        return {
+            "entries": len(entries),
+            "bytes": int(sum(size for _, size, _ in entries)),
+            "max_bytes": self.max_bytes,
+        }
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
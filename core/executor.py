@@ -0,0 +1,329 @@
+from __future__ import annotations
+import atexit
+import os
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Any, Iterator, List, Optional, Callable, Sequence, Tuple
+
+# Below this many bytes of numeric data the pool round-trip costs more than it saves.
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+_ALIGN = 64
+
+# a worker could not attach to a shared block, or the pool died: the call runs serially
+_POOL_FAILURES = (BrokenProcessPool, FileNotFoundError)
+
+# (column label, dtype str, byte offset, length)
+ColumnSpec = Tuple[Any, str, int, int]
+
+
+def _shareable(s: pd.Series) -> bool:
+    return isinstance(s.dtype, np.dtype) and s.dtype.kind in "iufb"
+
+
+def _views(buf, specs: Sequence[ColumnSpec]) -> Dict[Any, np.ndarray]:
+    return {
+        col: np.ndarray((n,), dtype=np.dtype(dtype), buffer=buf, offset=offset)
+        for col, dtype, offset, n in specs
+    }
+
+
+def _run_columns(name: str, specs: List[ColumnSpec], fn: Callable, args: tuple) -> list:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        arrays = _views(shm.buf, specs)
+        out = [fn(pd.Series(arrays[col], name=col, copy=False), *args) for col, *_ in specs]
+        del arrays
+        return out
+    finally:
+        shm.close()
+
+
+def _run_block(name: str, specs: List[ColumnSpec], fn: Callable, args: tuple):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        arrays = _views(shm.buf, specs)
+        frame = pd.DataFrame({col: arrays[col] for col, *_ in specs}, columns=[col for col, *_ in specs])
+        del arrays
+        return fn(frame, *args)
+    finally:
+        shm.close()
+
+
+def _run_array(name: str, shape: Tuple[int, ...], dtype: str, fn: Callable, task, args: tuple):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        try:
+            return fn(arr, task, *args)
+        finally:
+            del arr
+    finally:
+        shm.close()
+
+
+class SharedFrame:
+    """
+    Numeric numpy columns of a DataFrame copied once into one shared-memory block.
+    Workers attach by name and wrap their columns without copying. Reference counted:
+    the creator holds one reference and every call using the block acquires one, and
+    the block is unlinked when the last is released, so a call's workers can always
+    attach whatever other threads do with the executor meanwhile.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[Any]):
+        layout: List[ColumnSpec] = []
+        offset = 0
+        for col in columns:
+            s = df[col]
+            layout.append((col, s.dtype.str, offset, len(s)))
+            offset += -(-s.nbytes // _ALIGN) * _ALIGN
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self.specs = {spec[0]: spec for spec in layout}
+        views = _views(self.shm.buf, layout)
+        for col, view in views.items():
+            view[:] = df[col].to_numpy()
+        del views
+        self._refs = 1
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Take a reference; False once the block is gone."""
+        with self._lock:
+            if self._refs == 0:
+                return False
+            self._refs += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._refs -= 1
+            last = self._refs == 0
+        if last:
+            self.close()
+
+    @property
+    def nbytes(self) -> int:
+        return self.shm.size
+
+    def specs_for(self, columns: Sequence[Any]) -> List[ColumnSpec]:
+        return [self.specs[c] for c in columns]
+
+    def close(self) -> None:
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ComputeExecutor:
+    """
+    Fans per-column or per-column-block work out to a process pool over a SharedFrame.
+
+    `fn` must be a module-level function (it is pickled by reference); it receives the
+    same Series / DataFrame values it would get serially, so results are identical.
+    Runs serially when workers <= 1, when the numeric data is smaller than
+    `min_bytes`, or for columns that cannot be shared (extension dtypes). The frame
+    last shared is kept until another frame is shared or release() is called, so
+    several analyses of one dataset copy it to shared memory once (frames are
+    treated as immutable, as everywhere in the app). Executors are shared by every
+    session and thread: each call holds its own reference to the frame it uses.
+    """
+
+    def __init__(self, workers: Optional[int] = None, min_bytes: int = PARALLEL_MIN_BYTES):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.min_bytes = min_bytes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._shared: Optional[SharedFrame] = None
+        self._shared_src = None
+        self._lock = threading.Lock()
+
+    # ---- shared frame ----
+    def _share(self, df: pd.DataFrame, columns: Sequence[Any]) -> SharedFrame:
+        """The shared frame of `df`, acquired for one call: release() it once the call's tasks are done."""
+        with self._lock:
+            src = self._shared_src() if self._shared_src is not None else None
+            if src is df and all(c in self._shared.specs for c in columns) and self._shared.acquire():
+                return self._shared
+            self._drop_shared()
+            # share every eligible numeric column so later calls on this frame reuse it
+            eligible = [c for c in df.columns if _shareable(df[c])]
+            frame = SharedFrame(df, list(dict.fromkeys(eligible + list(columns))))
+            frame.acquire()
+            self._shared, self._shared_src = frame, weakref.ref(df)
+            return frame
+
+    def _drop_shared(self) -> None:
+        if self._shared is not None:
+            self._shared.release()  # unlinked now, or when the last running call lets go
+        self._shared = None
+        self._shared_src = None
+
+    def release(self) -> None:
+        with self._lock:
+            self._drop_shared()
+
+    def shutdown(self) -> None:
+        self.release()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _parallel(self, df: pd.DataFrame, columns: Sequence[Any]) -> bool:
+        if self.workers <= 1 or len(columns) < 2:
+            return False
+        return sum(df[c].nbytes for c in columns) >= self.min_bytes
+
+    def _pool_failed(self, error: Exception) -> None:
+        if isinstance(error, BrokenProcessPool):
+            with self._lock:
+                self._pool = None
+
+    @staticmethod
+    def _finish(futures, frame: Optional[SharedFrame]) -> None:
+        """Cancel what has not started, wait for what has, then let go of the frame."""
+        for fut in futures:
+            fut.cancel()
+        wait(futures)
+        if frame is not None:
+            frame.release()
+
+    # ---- fan-out ----
+    def map_columns(self, df: pd.DataFrame, columns: Sequence[Any], fn: Callable, *args) -> Dict[Any, Any]:
+        """{col: fn(df[col], *args)} for each column, in column order."""
+        columns = list(columns)
+        shared = [c for c in columns if _shareable(df[c])]
+        if not self._parallel(df, shared):
+            return {c: fn(df[c], *args) for c in columns}
+
+        frame = self._share(df, shared)
+        # about four tasks per worker, columns dealt round-robin
+        n_tasks = min(len(shared), self.workers * 4)
+        chunks = [shared[i::n_tasks] for i in range(n_tasks)]
+        futures = []
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_run_columns, frame.shm.name, frame.specs_for(chunk), fn, args) for chunk in chunks]
+            results: Dict[Any, Any] = {c: fn(df[c], *args) for c in columns if c not in frame.specs}
+            for chunk, fut in zip(chunks, futures):
+                results.update(zip(chunk, fut.result()))
+        except _POOL_FAILURES as e:
+            self._pool_failed(e)
+            return {c: fn(df[c], *args) for c in columns}
+        finally:
+            self._finish(futures, frame)
+        return {c: results[c] for c in columns}
+
+    def imap_columns(self, df: pd.DataFrame, columns: Sequence[Any], fn: Callable, *args) -> Iterator[Tuple[Any, Any]]:
+        """
+        (col, fn(df[col], *args)) per column as each one finishes (completion order),
+        one task per column. Meant for per-column work that is heavy whatever the data
+        size (rendering charts), so the pool is used even below `min_bytes`; columns
+        that cannot be shared are pickled to the workers. The iterator holds its own
+        reference to the shared frame until it finishes or is closed, so other calls
+        on the executor cannot unlink the block mid-stream; closing it cancels the
+        columns not started yet.
+        """
+        columns = list(columns)
+        if self.workers <= 1 or len(columns) < 2:
+            for c in columns:
+                yield c, fn(df[c], *args)
+            return
+
+        shared = [c for c in columns if _shareable(df[c])]
+        frame = self._share(df, shared) if shared else None
+        futures: Dict[Any, Tuple[Any, bool]] = {}
+        done = set()
+        try:
+            pool = self._get_pool()
+            for c in columns:
+                if frame is not None and c in frame.specs:
+                    futures[pool.submit(_run_columns, frame.shm.name, frame.specs_for([c]), fn, args)] = (c, True)
+                else:
+                    futures[pool.submit(fn, df[c], *args)] = (c, False)
+            for fut in as_completed(futures):
+                col, in_shm = futures[fut]
+                out = fut.result()
+                done.add(col)
+                yield col, out[0] if in_shm else out
+        except _POOL_FAILURES as e:
+            self._pool_failed(e)
+            for c in columns:
+                if c not in done:
+                    yield c, fn(df[c], *args)
+        finally:
+            self._finish(list(futures), frame)
+
+    def map_blocks(self, df: pd.DataFrame, blocks: Sequence[Sequence[Any]], fn: Callable, *args) -> list:
+        """[fn(df[block], *args) for each block of columns]."""
+        blocks = [list(b) for b in blocks]
+        columns = list(dict.fromkeys(c for b in blocks for c in b))
+        if len(blocks) < 2 or not self._parallel(df, columns) or not all(_shareable(df[c]) for c in columns):
+            return [fn(df[b], *args) for b in blocks]
+
+        frame = self._share(df, columns)
+        futures = []
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_run_block, frame.shm.name, frame.specs_for(b), fn, args) for b in blocks]
+            return [f.result() for f in futures]
+        except _POOL_FAILURES as e:
+            self._pool_failed(e)
+            return [fn(df[b], *args) for b in blocks]
+        finally:
+            self._finish(futures, frame)
+
+    def map_array(self, arr: np.ndarray, fn: Callable, tasks: Sequence[Any], *args) -> list:
+        """[fn(arr, task, *args) for each task], with `arr` placed in shared memory for the workers."""
+        if self.workers <= 1 or len(tasks) < 2 or arr.nbytes < self.min_bytes:
+            return [fn(arr, t, *args) for t in tasks]
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        futures = []
+        try:
+            view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+            view[...] = arr
+            del view
+            pool = self._get_pool()
+            futures = [pool.submit(_run_array, shm.name, arr.shape, arr.dtype.str, fn, t, args) for t in tasks]
+            return [f.result() for f in futures]
+        except _POOL_FAILURES as e:
+            self._pool_failed(e)
+            return [fn(arr, t, *args) for t in tasks]
+        finally:
+            self._finish(futures, None)
+            shm.close()
+            shm.unlink()
+
+
+_EXECUTORS: Dict[int, ComputeExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()  # sessions are threads: two could each create a pool
+
+
+def get_executor(workers: Optional[int] = None) -> ComputeExecutor:
+    """Process-wide executor per worker count (pools are reused across calls)."""
+    n = max(1, int(workers or 1))
+    with _EXECUTORS_LOCK:
+        if n not in _EXECUTORS:
+            _EXECUTORS[n] = ComputeExecutor(workers=n)
+        return _EXECUTORS[n]
+
+
+@atexit.register
+def _shutdown_executors() -> None:
+    with _EXECUTORS_LOCK:
+        executors = list(_EXECUTORS.values())
+        _EXECUTORS.clear()
+    for ex in executors:
+        ex.shutdown()
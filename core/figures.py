@@ -0,0 +1,143 @@
+from __future__ import annotations
+import io
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+# figures alive at once per thread; past this the thread's oldest is released (its caller forgot to)
+MAX_LIVE_FIGURES = 32
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class FigureManager:
+    """
+    Figures on a non-GUI Agg canvas, outside pyplot's global registry: nothing keeps
+    a figure alive but its caller, release() frees it (axes and the Agg pixel buffer)
+    as soon as it is encoded, and each thread has at most `max_live` figures at a
+    time. The cap is per thread so reaching it only ever evicts a figure that the
+    same thread created and has moved on from, never one another session's script
+    thread is still drawing or encoding.
+    """
+
+    def __init__(self, max_live: int = MAX_LIVE_FIGURES):
+        self.max_live = max_live
+        # thread ident -> {id(fig): weakref}, oldest first
+        self._live: Dict[int, "OrderedDict[int, weakref.ref]"] = {}
+        self._owner: Dict[int, int] = {}
+        self._lock = threading.RLock()  # weakref callbacks may run while it is held
+        self.created = 0
+        self.released = 0
+        self.evicted = 0
+        self.peak_live = 0
+
+    def subplots(self, nrows: int = 1, ncols: int = 1, **kwargs) -> Tuple[Figure, Any]:
+        """(fig, ax) like plt.subplots(), on an Agg canvas of its own."""
+        fig = Figure(**{k: kwargs.pop(k) for k in ("figsize", "dpi") if k in kwargs})
+        FigureCanvasAgg(fig)
+        ax = fig.subplots(nrows, ncols, **kwargs)
+        thread = threading.get_ident()
+        with self._lock:
+            self.created += 1
+            live = self._live.setdefault(thread, OrderedDict())
+            live[id(fig)] = weakref.ref(fig, self._forget(thread, id(fig)))
+            self._owner[id(fig)] = thread
+            stale = []
+            while len(live) > self.max_live:
+                key, ref = live.popitem(last=False)
+                self._owner.pop(key, None)
+                stale.append(ref())
+            self.evicted += sum(f is not None for f in stale)
+            self.peak_live = max(self.peak_live, self._n_live())
+        for f in stale:
+            if f is not None:
+                self._clear(f)
+        return fig, ax
+
+    def _n_live(self) -> int:
+        return sum(len(live) for live in self._live.values())
+
+    def _pop(self, thread: int, key: int) -> None:
+        live = self._live.get(thread)
+        if live is not None:
+            live.pop(key, None)
+            if not live:
+                del self._live[thread]
+        self._owner.pop(key, None)
+
+    def _forget(self, thread: int, key: int):
+        def drop(ref):
+            with self._lock:
+                if self._live.get(thread, {}).get(key) is ref:
+                    self._pop(thread, key)
+        return drop
+
+    @staticmethod
+    def _clear(fig: Figure) -> None:
+        fig.clear()
+        FigureCanvasAgg(fig)  # a fresh canvas: the old one and its pixel buffer go
+
+    def release(self, fig: Figure) -> None:
+        """Free a figure once it has been encoded; it must not be drawn again."""
+        with self._lock:
+            thread = self._owner.get(id(fig))
+            if thread is None:
+                return
+            self._pop(thread, id(fig))
+            self.released += 1
+        self._clear(fig)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            figs = [f for live in self._live.values() for f in (ref() for ref in live.values()) if f is not None]
+            counters = {
+                "created": self.created,
+                "released": self.released,
+                "evicted": self.evicted,
+                "peak_live": self.peak_live,
+                "max_live": self.max_live,
+            }
+        renderer = 0
+        for f in figs:
+            r = getattr(f.canvas, "renderer", None)
+            if r is not None:
+                renderer += int(r.width * r.height * 4)  # RGBA buffer
+        return {"live": len(figs), **counters, "renderer_bytes": renderer, "rss_bytes": _rss_bytes()}
+
+
+_MANAGER = FigureManager()
+
+
+def new_figure(**kwargs) -> Tuple[Figure, Any]:
+    """(fig, ax) from the process-wide figure manager."""
+    return _MANAGER.subplots(**kwargs)
+
+
+def release_figure(fig) -> None:
+    _MANAGER.release(fig)
+
+
+def figure_png(fig, dpi: int = 120, tight: bool = True) -> bytes:
+    """`fig` encoded as PNG, then released; tight=False skips the extra layout pass of bbox_inches="tight"."""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight" if tight else None)
+    finally:
+        release_figure(fig)
+    return buf.getvalue()
+
+
+def figure_stats() -> Dict[str, Any]:
+    return _MANAGER.stats()
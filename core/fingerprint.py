@@ -0,0 +1,154 @@
+from __future__ import annotations
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.result_cache import dataset_state
+
+_SEED = np.uint64(0x345678)
+_MULT = np.uint64(1000003)
+
+
+def _column_hash(s: pd.Series) -> np.ndarray:
+    """
+    64-bit hash per value that is equal exactly when pandas' duplicated() treats the
+    values as equal: floats are normalised (-0.0 == 0.0, one NaN) and object columns
+    are hashed through their factorize codes (1 == 1.0, as in the hashtable).
+    """
+    dtype = s.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind == "f":
+        v = s.to_numpy(dtype=np.float64) + 0.0
+        v[np.isnan(v)] = np.nan
+        keys = v.view(np.uint64)
+    elif isinstance(dtype, np.dtype) and dtype.kind in "iub":
+        keys = s.to_numpy().astype(np.int64, copy=False).view(np.uint64)
+    elif dtype == "object":
+        keys = pd.factorize(s)[0].view(np.uint64)
+    else:
+        return pd.util.hash_pandas_object(s, index=False).to_numpy()
+    return pd.util.hash_array(keys, categorize=False)
+
+
+def _combine(hashes: List[np.ndarray], n_rows: int) -> np.ndarray:
+    out = np.full(n_rows, _SEED, dtype=np.uint64)
+    mult = _MULT
+    for i, h in enumerate(hashes):
+        out ^= h
+        out *= mult
+        mult += np.uint64(82520 + 2 * (len(hashes) - i))
+    return out
+
+
+def _same_values(s: pd.Series, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Rows a[i] and b[i] of `s` are equal (missing equals missing)."""
+    va = s.iloc[a].reset_index(drop=True)
+    vb = s.iloc[b].reset_index(drop=True)
+    eq = (va == vb).to_numpy(dtype=bool, na_value=False)
+    return eq | (va.isna().to_numpy() & vb.isna().to_numpy())
+
+
+class RowFingerprints:
+    """
+    Per-dataset row-hash index for duplicate queries (DataFrame or ColumnarDataset).
+
+    Column hashes are computed once and combined per column subset; duplicates are
+    found on the 64-bit row hashes and then verified against the actual values, so a
+    hash collision can never merge distinct rows (a collision falls back to an exact
+    duplicated()). Results match df.duplicated(subset, keep).
+    """
+
+    def __init__(self, df, max_cache_bytes: int = 256 * 1024 * 1024, codes: Optional[Dict[Any, np.ndarray]] = None):
+        self._df = weakref.ref(df)
+        self.n_rows = int(len(df))
+        self.columns = list(df.columns)
+        self.max_cache_bytes = max_cache_bytes
+        self._col_hashes: Dict[Any, np.ndarray] = {}
+        self._row_hashes: Dict[Tuple, np.ndarray] = {}
+        self._masks: Dict[Tuple, np.ndarray] = {}
+        self.collisions = 0
+        # factorize codes already computed elsewhere (e.g. by the profiler) are valid keys
+        for col, c in (codes or {}).items():
+            self._col_hashes[col] = pd.util.hash_array(c.astype(np.int64, copy=False).view(np.uint64), categorize=False)
+
+    @property
+    def df(self):
+        df = self._df()
+        if df is None:
+            raise RuntimeError("The dataset for this fingerprint index no longer exists.")
+        return df
+
+    def _subset(self, subset: Optional[List[Any]]) -> Tuple:
+        if not subset:
+            return tuple(self.columns)
+        missing = [c for c in subset if c not in self.columns]
+        if missing:
+            raise KeyError(f"Columns not found: {missing}")
+        wanted = set(subset)
+        # order does not change which rows are duplicates
+        return tuple(c for c in self.columns if c in wanted)
+
+    def _column_hash(self, col) -> np.ndarray:
+        h = self._col_hashes.get(col)
+        if h is None:
+            h = _column_hash(self.df[col])
+            if (len(self._col_hashes) + 1) * h.nbytes <= self.max_cache_bytes:
+                self._col_hashes[col] = h
+        return h
+
+    def row_hashes(self, subset: Optional[List[Any]] = None) -> np.ndarray:
+        key = self._subset(subset)
+        h = self._row_hashes.get(key)
+        if h is None:
+            h = _combine([self._column_hash(c) for c in key], self.n_rows)
+            self._row_hashes[key] = h
+        return h
+
+    def _verified_groups(self, key: Tuple) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(group code per row, first position per group); None on a hash collision."""
+        codes, uniques = pd.factorize(self.row_hashes(list(key)))
+        first = np.full(len(uniques), self.n_rows, dtype=np.int64)
+        np.minimum.at(first, codes, np.arange(self.n_rows))
+        rows = np.flatnonzero(first[codes] != np.arange(self.n_rows))
+        reps = first[codes[rows]]
+        if len(rows):
+            df = self.df
+            for col in key:
+                if not _same_values(df[col], rows, reps).all():
+                    self.collisions += 1
+                    return None
+        return codes, first
+
+    def duplicated(self, subset: Optional[List[Any]] = None, keep="first") -> np.ndarray:
+        """Boolean mask, same as df.duplicated(subset, keep)."""
+        key = self._subset(subset)
+        cache_key = (key, keep)
+        mask = self._masks.get(cache_key)
+        if mask is not None:
+            return mask
+
+        groups = self._verified_groups(key)
+        if groups is None:
+            # exact pass over the subset columns (DataFrame or ColumnarDataset)
+            mask = self.df[list(key)].duplicated(keep=keep).to_numpy()
+        else:
+            mask = pd.Series(groups[0]).duplicated(keep=keep).to_numpy()
+        self._masks[cache_key] = mask
+        return mask
+
+    def duplicate_count(self, subset: Optional[List[Any]] = None) -> int:
+        return int(self.duplicated(subset, keep="first").sum())
+
+    def duplicate_positions(self, subset: Optional[List[Any]] = None, keep="first") -> np.ndarray:
+        return np.flatnonzero(self.duplicated(subset, keep=keep))
+
+
+_INDEXES: Dict[int, Tuple[weakref.ref, int, RowFingerprints]] = {}
+
+
+def get_fingerprints(df, codes: Optional[Dict[Any, np.ndarray]] = None) -> RowFingerprints:
+    """
+    The fingerprint index of this dataset object, built on first use (`codes` can seed
+    it with per-column factorize codes) and rebuilt when the dataset version changes.
+    """
+    return dataset_state(df, _INDEXES, lambda: RowFingerprints(df, codes=codes))
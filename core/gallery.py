@@ -0,0 +1,55 @@
+from __future__ import annotations
+import pandas as pd
+from typing import Dict, Any, Iterator, List, Optional
+
+from core.chart_summary import summarize_hist, summarize_topk_bar
+from core.columnar import is_columnar
+from core.executor import get_executor
+from core.figures import figure_png
+from core.histogram import histogram
+from core.visualizer import fig_bar_topk, fig_hist
+
+# thumbnails: the default figure size at a low dpi
+THUMB_DPI = 50
+
+
+def tile_kind(dtype) -> str:
+    """"hist" for numeric columns, "bar" (top-K values) for everything else."""
+    return "hist" if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype) else "bar"
+
+
+def render_tile(s: pd.Series, k: int = 10, bins: int = 30, dpi: int = THUMB_DPI, scale: float = 1.0) -> Dict[str, Any]:
+    """Thumbnail PNG and chart summary of one column (runs in a pool worker); counts multiplied by `scale`."""
+    col = s.name
+    frame = s.to_frame()
+    kind = tile_kind(s.dtype)
+    try:
+        if kind == "hist":
+            hist = histogram(frame, col, bins=bins)
+            fig, summary = fig_hist(frame, col, bins=bins, hist=hist, scale=scale), summarize_hist(frame, col, hist=hist, scale=scale)
+            fig.tight_layout()  # fig_bar_topk lays itself out; neither needs bbox_inches="tight" again
+        else:
+            fig, summary = fig_bar_topk(frame, col, k=k, scale=scale), summarize_topk_bar(frame, col, k=k, scale=scale)
+    except (ValueError, TypeError) as e:
+        return {"column": col, "kind": kind, "png": None, "summary": None, "error": str(e)}
+    return {"column": col, "kind": kind, "png": figure_png(fig, dpi=dpi, tight=False), "summary": summary}
+
+
+def iter_gallery(
+    df,
+    cols: Optional[List[Any]] = None,
+    k: int = 10,
+    bins: int = 30,
+    dpi: int = THUMB_DPI,
+    workers: Optional[int] = None,
+    scale: float = 1.0,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Gallery tiles (render_tile) of `cols` (default: every column), yielded as they
+    finish, counts multiplied by `scale` (core.sampling.sample_scale); with workers > 1 the columns render on the process pool. Closing the
+    iterator (or stopping the page run) cancels the tiles not started yet.
+    """
+    cols = list(df.columns) if not cols else [c for c in cols if c in df.columns]
+    ex = get_executor(workers if not is_columnar(df) else 1)
+    for _, tile in ex.imap_columns(df, cols, render_tile, k, bins, dpi, scale):
+        yield tile
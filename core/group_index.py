@@ -0,0 +1,132 @@
+from __future__ import annotations
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.result_cache import dataset_state
+
+# reductions answered from the index; anything else goes through pandas
+SUPPORTED_AGGS = frozenset({"sum", "mean", "count", "min", "max"})
+# group indexes kept per dataset version (least recently used dropped first)
+MAX_INDEXES = 8
+
+
+def _factorize_key(s: pd.Series) -> Tuple[np.ndarray, int]:
+    """
+    (codes in sorted key order with missing last, number of keys). Object columns whose
+    values do not compare with each other (a date among ints) cannot be sorted; their
+    keys are numbered in first-appearance order instead.
+    """
+    try:
+        codes, uniques = pd.factorize(s, sort=True, use_na_sentinel=False)
+        return codes, len(uniques)
+    except TypeError:
+        codes, uniques = pd.factorize(s, sort=False)
+        missing = codes < 0
+        if missing.any():
+            codes[missing] = len(uniques)
+            return codes, len(uniques) + 1
+        return codes, len(uniques)
+
+
+def _group_ids(df, group_cols: List[Any]) -> Tuple[np.ndarray, int]:
+    """
+    Dense group id per row, numbered in sorted key order (missing keys last), as
+    groupby(sort=True, dropna=False, observed=True) orders its groups.
+    """
+    ids = np.zeros(len(df), dtype=np.int64)
+    size = 1
+    for col in group_cols:
+        codes, n_keys = _factorize_key(df[col])
+        if size * n_keys >= 2 ** 62:
+            # renumber the combinations seen so far before the product overflows
+            ids, seen = pd.factorize(ids, sort=True)
+            size = len(seen)
+        ids = ids * n_keys + codes
+        size *= max(n_keys, 1)
+    ids, uniques = pd.factorize(ids, sort=True)
+    return ids.astype(np.int64, copy=False), len(uniques)
+
+
+class GroupIndex:
+    """
+    Factorized groups of one dataset version for one tuple of group columns: a group
+    id per row, rows ordered by group and each group's first row. Aggregations then
+    cost one gather and one reduceat per metric.
+    """
+
+    def __init__(self, df, group_cols: List[Any]):
+        self.group_cols = list(group_cols)
+        self.ids, self.n_groups = _group_ids(df, self.group_cols)
+        self.order = np.argsort(self.ids, kind="stable")
+        sizes = np.bincount(self.ids, minlength=self.n_groups)
+        self.starts = (np.cumsum(sizes) - sizes).astype(np.int64)  # empty when there are no rows
+        self.first = self.order[self.starts]
+
+    def keys(self, df, groups: np.ndarray) -> pd.DataFrame:
+        """Group-column values of the given groups (taken from their first rows)."""
+        rows = self.first[groups]
+        out = {}
+        for c in self.group_cols:
+            s = df[c].iloc[rows].reset_index(drop=True)
+            # groupby reports a missing key as NaN whatever the row held (None, NaN, ...)
+            out[c] = s.where(s.notna(), np.nan) if s.dtype == object else s
+        return pd.DataFrame(out)
+
+    def reduce(self, values: pd.Series, agg: str) -> pd.Series:
+        """Per-group `agg` of one column, missing values skipped (groupby semantics)."""
+        present = values.notna().to_numpy()
+        if agg == "count":
+            return pd.Series(np.bincount(self.ids[present], minlength=self.n_groups).astype(np.int64))
+        dtype = values.dtype
+        if not (isinstance(dtype, np.dtype) and dtype.kind in "iuf"):
+            return values.reset_index(drop=True).groupby(self.ids, sort=True).agg(agg)
+        v = values.to_numpy()
+        if agg == "sum" or agg == "mean":
+            filled = np.where(present, v, 0) if dtype.kind == "f" else v
+            sums = np.add.reduceat(filled[self.order], self.starts) if len(v) else np.zeros(0, dtype=v.dtype)
+            if agg == "sum":
+                return pd.Series(sums)
+            counts = np.bincount(self.ids[present], minlength=self.n_groups)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return pd.Series(sums / np.where(counts > 0, counts, np.nan))
+        if not len(v):
+            return pd.Series(v[:0])
+        # fmin / fmax skip NaN; an all-missing group stays NaN
+        fn = np.fmin if agg == "min" else np.fmax
+        return pd.Series(fn.reduceat(v[self.order], self.starts))
+
+
+_INDEXES: Dict[int, Tuple[weakref.ref, int, "OrderedDict[Tuple, GroupIndex]"]] = {}
+
+
+def get_group_index(df, group_cols: List[Any]) -> GroupIndex:
+    """The group index of this dataset version for `group_cols`, built on first use."""
+    indexes = dataset_state(df, _INDEXES, OrderedDict)
+    key = tuple(group_cols)
+    index = indexes.get(key)
+    if index is None:
+        index = indexes[key] = GroupIndex(df, list(group_cols))
+        while len(indexes) > MAX_INDEXES:
+            indexes.popitem(last=False)
+    indexes.move_to_end(key)
+    return index
+
+
+def top_groups(values: pd.Series, n: Optional[int]) -> np.ndarray:
+    """
+    Positions of the `n` largest values, descending, missing last, ties in group
+    order; a partial selection instead of a full sort when n is small.
+    """
+    score = -values.to_numpy(dtype=np.float64, na_value=np.nan)
+    score[np.isnan(score)] = np.inf
+    if n is not None and n < len(score):
+        # everything tied with the n-th value competes, so ties resolve by position
+        cut = np.partition(score, n - 1)[n - 1]
+        part = np.flatnonzero(score <= cut)
+    else:
+        part = np.arange(len(score))
+    part = part[np.lexsort((part, score[part]))]
+    return part if n is None else part[:n]
@@ -0,0 +1,165 @@
+from __future__ import annotations
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Tuple
+
+from core.result_cache import dataset_state
+
+
+class ColumnDistribution:
+    """
+    Sorted finite values of one numeric column plus its summary stats, from a single
+    pass over the column (±inf values are counted in stats["non_finite"], not binned). Any binning is then a searchsorted of the bin edges
+    (O(bins log n)), so re-binning never rescans the data.
+    """
+
+    def __init__(self, s: pd.Series):
+        v = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        finite = np.isfinite(v)
+        valid = v[finite]
+        self.sorted = np.sort(valid)
+        n = len(valid)
+        self.stats: Dict[str, Any] = {"count": int(n)}
+        non_finite = int(np.count_nonzero(~finite) - np.count_nonzero(np.isnan(v)))
+        if non_finite:
+            self.stats["non_finite"] = non_finite
+        if n:
+            mid = n // 2
+            median = self.sorted[mid] if n % 2 else (self.sorted[mid - 1] + self.sorted[mid]) / 2
+            self.stats.update({
+                "min": float(self.sorted[0]),
+                "max": float(self.sorted[-1]),
+                "mean": float(valid.mean()),
+                "median": float(median),
+                "std": float(valid.std(ddof=1)) if n > 1 else float("nan"),
+                "n_unique": int(1 + np.count_nonzero(np.diff(self.sorted))),
+            })
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.sorted.nbytes)
+
+    def counts(self, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(edges, counts) exactly as np.histogram(values, bins) / ax.hist would bin them."""
+        if len(self.sorted) == 0:
+            return np.linspace(0.0, 1.0, bins + 1), np.zeros(bins, dtype=np.int64)
+        edges = np.histogram_bin_edges(self.sorted[[0, -1]], bins=bins)
+        pos = np.searchsorted(self.sorted, edges, side="left")
+        pos[-1] = len(self.sorted)  # the last bin includes its right edge
+        return edges, np.diff(pos).astype(np.int64)
+
+
+class _Distributions:
+    """Column distributions of one dataset version, within a byte budget."""
+
+    def __init__(self, df, max_cache_bytes: int):
+        self._df = weakref.ref(df)
+        self.max_cache_bytes = max_cache_bytes
+        self.columns: Dict[Any, ColumnDistribution] = {}
+
+    def get(self, col) -> ColumnDistribution:
+        dist = self.columns.get(col)
+        if dist is None:
+            dist = ColumnDistribution(self._df()[col])
+            if sum(d.nbytes for d in self.columns.values()) + dist.nbytes <= self.max_cache_bytes:
+                self.columns[col] = dist
+        return dist
+
+
+_INDEXES: Dict[int, Tuple[weakref.ref, int, _Distributions]] = {}
+
+
+def column_distribution(df, col, max_cache_bytes: int = 256 * 1024 * 1024) -> ColumnDistribution:
+    """The distribution of `col` in this dataset version, built on first use."""
+    return dataset_state(df, _INDEXES, lambda: _Distributions(df, max_cache_bytes)).get(col)
+
+
+def histogram(df, col, bins: int = 30) -> Dict[str, Any]:
+    """
+    Bin edges, counts and summary stats of a numeric column from one shared kernel;
+    fig_hist draws from it and summarize_hist reports it.
+    """
+    dist = column_distribution(df, col)
+    edges, counts = dist.counts(bins)
+    return {"column": col, "bins": int(bins), "edges": edges, "counts": counts, "stats": dict(dist.stats)}
+
+
+# ---- 2D density ----
+
+DENSITY_GRID = 200
+# rank correlation of large scatters is estimated on this many (uniformly sampled) pairs
+SPEARMAN_ROWS = 200_000
+
+
+def _bin_index(v: np.ndarray, lo: float, hi: float, bins: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(edges, bin per value) of `bins` equal-width bins over finite [lo, hi], as np.histogram2d bins them."""
+    if hi <= lo:
+        lo, hi = lo - 0.5, hi + 0.5  # constant column: np.histogram's unit range
+    idx = ((v - lo) * (bins / (hi - lo))).astype(np.int64)
+    return np.linspace(lo, hi, bins + 1), np.minimum(idx, bins - 1)  # the max value falls in the last bin
+
+
+def density_grid(df, x, y, grid: int = DENSITY_GRID) -> Dict[str, Any]:
+    """
+    Points of a scatter binned into a grid x grid count raster in one vectorised pass
+    (cell index per point, one bincount), with the scatter's summary stats and
+    density stats computed from the same arrays. Pairs with a ±inf value have no cell
+    and are left out (counted in stats["non_finite"]).
+    """
+    xv = df[x].to_numpy(dtype=np.float64, na_value=np.nan)
+    yv = df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+    both = np.isfinite(xv) & np.isfinite(yv)
+    non_finite = int(np.count_nonzero(~both) - np.count_nonzero(np.isnan(xv) | np.isnan(yv)))
+    xv, yv = xv[both], yv[both]
+    n = len(xv)
+    out: Dict[str, Any] = {"x": x, "y": y, "n_points": int(n), "grid": int(grid)}
+    if non_finite:
+        out["stats"] = {"non_finite": non_finite}
+    if n == 0:
+        return out
+
+    x_lo, x_hi, y_lo, y_hi = float(xv.min()), float(xv.max()), float(yv.min()), float(yv.max())
+    x_edges, ix = _bin_index(xv, x_lo, x_hi, grid)
+    y_edges, iy = _bin_index(yv, y_lo, y_hi, grid)
+    counts = np.bincount(ix * grid + iy, minlength=grid * grid).reshape(grid, grid)
+
+    dx, dy = xv - xv.mean(), yv - yv.mean()
+    sxx, syy = float(dx @ dx), float(dy @ dy)
+    corr = float((dx @ dy) / np.sqrt(sxx * syy)) if sxx > 0 and syy > 0 else None
+    if corr is not None:
+        pick = np.sort(np.random.default_rng(0).choice(n, SPEARMAN_ROWS, replace=False)) if n > SPEARMAN_ROWS else slice(None)
+        spearman = float(pd.Series(xv[pick]).rank().corr(pd.Series(yv[pick]).rank()))
+    else:
+        spearman = None
+
+    occupied = np.sort(counts[counts > 0])[::-1]
+    top = max(1, int(np.ceil(len(occupied) * 0.01)))
+    peak = np.unravel_index(int(np.argmax(counts)), counts.shape)
+    out.update({
+        "x_edges": x_edges,
+        "y_edges": y_edges,
+        "counts": counts,
+        "stats": {
+            **out.get("stats", {}),
+            "corr": corr,
+            "spearman": spearman,
+            "x_min": x_lo, "x_max": x_hi, "y_min": y_lo, "y_max": y_hi,
+        },
+        "density": {
+            "grid": [int(grid), int(grid)],
+            "occupied_cells": int(len(occupied)),
+            "occupied_pct": float(len(occupied) / (grid * grid)),
+            "max_cell_count": int(occupied[0]),
+            # share of all points in the densest 1% of occupied cells
+            "top1pct_cells_share": float(occupied[:top].sum() / n),
+            "peak": {
+                "x": float((x_edges[peak[0]] + x_edges[peak[0] + 1]) / 2),
+                "y": float((y_edges[peak[1]] + y_edges[peak[1] + 1]) / 2),
+                "count": int(counts[peak]),
+            },
+        },
+    })
+    if n > SPEARMAN_ROWS and spearman is not None:
+        out["stats"]["spearman_rows"] = SPEARMAN_ROWS
+    return out
@@ -1,24 +1,417 @@
 from __future__ import annotations
+import io
+import os
+import time
+import numpy as np
 import pandas as pd
-from typing import Tuple, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from typing import Tuple, Dict, Any, Optional, Callable, List, Literal
 
-def load_dataframe(uploaded_file, sheet_name: Optional[str] = None) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+from core.dataset_cache import DatasetCache, content_key
+
+ProgressFn = Callable[[float], None]
+
+# Uploads larger than this are parsed in chunks instead of one read_csv call.
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+DEFAULT_CHUNK_ROWS = 200_000
+DEFAULT_SAMPLE_ROWS = 10_000
+_SCAN_BLOCK = 16 * 1024 * 1024
+
+PoolKind = Literal["thread", "process"]
+
+
+def _file_size(f) -> Optional[int]:
+    size = getattr(f, "size", None)
+    if size is not None:
+        return int(size)
+    try:
+        pos = f.tell()
+        f.seek(0, 2)
+        end = f.tell()
+        f.seek(pos)
+        return int(end)
+    except (AttributeError, OSError):
+        return None
+
+
+def _infer_csv_dtypes(uploaded_file, sample_rows: int, numeric_as_float: bool) -> Dict[str, Any]:
     """
-    Load CSV/XLSX to DataFrame.
-    Returns (df, meta) where meta includes file type, sheet name, and basic info.
+    Infer pinned dtypes from the leading `sample_rows` rows.
+    A column with any text in the sample is text in the full file too, so pinning it
+    to object is always safe. Numeric columns are left to the parser unless
+    `numeric_as_float`, which is needed when every chunk must share one schema.
+    """
+    sample = pd.read_csv(uploaded_file, nrows=sample_rows)
+    uploaded_file.seek(0)
+
+    pinned: Dict[str, Any] = {}
+    for col, dtype in sample.dtypes.items():
+        if dtype == "object":
+            pinned[col] = object
+        elif numeric_as_float and pd.api.types.is_numeric_dtype(dtype) and dtype != "bool":
+            pinned[col] = "float64"
+    return pinned
+
+
+def _piece_kind(s: pd.Series) -> Optional[str]:
+    """What a parsed piece of a column holds: "number", "bool", "text", or None (no values)."""
+    if s.dtype.kind in "iuf":
+        # an all-missing piece parses as float and takes any kind on concat
+        return "number" if s.notna().any() else None
+    if s.dtype.kind == "b":
+        return "bool"
+    if s.dtype == object:
+        inferred = pd.api.types.infer_dtype(s, skipna=True)
+        # booleans with missing values parse as object
+        return {"boolean": "bool", "empty": None}.get(inferred, "text")
+    return str(s.dtype)
+
+
+ParsedColumns = Dict[str, pd.Series]
+
+
+def _split_columns(frame: pd.DataFrame) -> ParsedColumns:
+    """
+    The columns of a parsed piece as Series that each own their data, so a column of
+    every piece can be released as soon as it is concatenated (a column of the frame
+    would be a view keeping its whole dtype block alive).
+    """
+    return {col: frame[col].copy() for col in frame.columns}
+
+
+def _concat_columns(pieces: List[ParsedColumns]) -> pd.DataFrame:
+    """
+    pd.concat of the pieces, one column at a time: each column's pieces are dropped as
+    soon as they are joined, so the peak is the result plus one column's pieces rather
+    than twice the frame. Every column gets the dtype pd.concat would give it.
+    """
+    names = list(pieces[0])
+    cols = {}
+    for col in names:
+        cols[col] = pd.concat([p.pop(col) for p in pieces], ignore_index=True)
+    return pd.DataFrame(cols, columns=names, copy=False)
+
+
+def _mixed_kind_columns(frames: List[ParsedColumns]) -> List[str]:
+    """
+    Columns whose pieces parsed to different kinds (numbers in one piece, text in
+    another). A single read_csv reads such a column as text throughout, while concat
+    would keep each piece's values (ints next to strs), so these must be re-read as str.
+    """
+    out = []
+    for col in frames[0]:
+        if len({f[col].dtype for f in frames}) < 2:
+            continue
+        kinds = {_piece_kind(f[col]) for f in frames} - {None}
+        if len(kinds) > 1:
+            out.append(col)
+    return out
+
+
+def _iter_csv_chunks(
+    uploaded_file,
+    chunk_rows: int,
+    sample_rows: int,
+    progress: Optional[ProgressFn],
+    numeric_as_float: bool = False,
+):
+    total = _file_size(uploaded_file)
+    uploaded_file.seek(0)
+    dtypes = _infer_csv_dtypes(uploaded_file, sample_rows, numeric_as_float)
+
+    with pd.read_csv(uploaded_file, dtype=dtypes, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield chunk
+            if progress is not None and total:
+                progress(min(uploaded_file.tell() / total, 1.0))
+    if progress is not None:
+        progress(1.0)
+
+
+def load_csv_chunked(
+    uploaded_file,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    progress: Optional[ProgressFn] = None,
+) -> pd.DataFrame:
+    """
+    Stream a CSV in `chunk_rows`-row chunks and concatenate the parsed pieces.
+    The raw text is never held in memory. Each chunk is split into columns as it is
+    parsed and the columns are joined one at a time (_concat_columns), so peak usage
+    is about the final frame plus one chunk and one column. Lower `chunk_rows` to
+    shrink the per-chunk overhead.
+    """
+    chunks = [_split_columns(c) for c in _iter_csv_chunks(uploaded_file, chunk_rows, sample_rows, progress)]
+    if not chunks:
+        uploaded_file.seek(0)
+        return pd.read_csv(uploaded_file)
+    if len(chunks) == 1:
+        return pd.DataFrame(chunks[0], copy=False)
+    mixed = _mixed_kind_columns(chunks)
+    df = _concat_columns(chunks)
+    if mixed:
+        # columns that turned to text after the first chunk: one more pass over just them
+        uploaded_file.seek(0)
+        text = pd.read_csv(uploaded_file, usecols=mixed, dtype={c: str for c in mixed})
+        for col in mixed:
+            df[col] = text[col].to_numpy()
+    return df
+
+
+def csv_to_parquet(
+    uploaded_file,
+    out_path: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    progress: Optional[ProgressFn] = None,
+) -> Dict[str, Any]:
+    """
+    Stream a CSV straight into a Parquet file, one row group per chunk.
+    Only one chunk is ever in memory. Numeric columns are stored as float64 so
+    chunks with and without missing values share one schema.
     """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    n_rows = 0
+    try:
+        for chunk in _iter_csv_chunks(uploaded_file, chunk_rows, sample_rows, progress, numeric_as_float=True):
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            n_rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        raise ValueError("CSV file is empty.")
+    return {"path": out_path, "rows": n_rows}
+
+
+def _safe_cuts(arr: np.ndarray, targets: List[int]) -> List[int]:
+    """
+    For each sorted target offset, the offset just past the first newline at or after it
+    that is outside a quoted field. Quote parity is carried across fixed-size blocks, so
+    the scan needs one byte of scratch per input byte in the current block only.
+    Escaped quotes ("") flip the parity twice and are handled for free.
+    """
+    cuts: List[int] = []
+    ti = 0
+    parity = 0
+    n = len(arr)
+    for b0 in range(0, n, _SCAN_BLOCK):
+        if ti >= len(targets):
+            break
+        block = arr[b0:b0 + _SCAN_BLOCK]
+        # uint8 wraps, but only the low bit (inside/outside quotes) matters
+        quotes = np.cumsum(block == 34, dtype=np.uint8) + np.uint8(parity)
+        safe_nl = np.flatnonzero((block == 10) & ((quotes & 1) == 0))
+        while ti < len(targets) and targets[ti] < b0 + len(block):
+            k = int(np.searchsorted(safe_nl, max(targets[ti] - b0, 0)))
+            if k >= len(safe_nl):
+                break
+            cut = b0 + int(safe_nl[k]) + 1
+            cuts.append(cut)
+            while ti < len(targets) and targets[ti] < cut:
+                ti += 1
+        parity = int(quotes[-1] & 1) if len(quotes) else parity
+    return cuts
+
+
+def _parse_csv_piece(data, names: List[str], dtypes: Dict[str, Any], usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=dtypes, usecols=usecols)
+
+
+def load_csv_parallel(
+    uploaded_file,
+    workers: Optional[int] = None,
+    pool: PoolKind = "process",
+    sample_rows: int = DEFAULT_SAMPLE_ROWS,
+    progress: Optional[ProgressFn] = None,
+) -> pd.DataFrame:
+    """
+    Parse a CSV on a worker pool.
+    The bytes are split into about one piece per worker on record boundaries (newlines
+    outside quotes), each piece is parsed with the header's column names and the text
+    columns pinned from a leading sample, and the pieces are concatenated column by
+    column (_concat_columns), so the peak stays near one copy of the frame. Columns
+    whose pieces came out with different kinds (numbers in one piece, text in a later
+    one) are re-parsed as str, as a single read_csv reads them. `progress` receives
+    the fraction of bytes parsed as each piece finishes.
+    """
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    uploaded_file.seek(0)
+    dtypes = _infer_csv_dtypes(uploaded_file, sample_rows, numeric_as_float=False)
+    names = pd.read_csv(uploaded_file, nrows=0).columns.tolist()
+    uploaded_file.seek(0)
+
+    raw = uploaded_file.getbuffer() if hasattr(uploaded_file, "getbuffer") else memoryview(uploaded_file.read())
+    arr = np.frombuffer(raw, dtype=np.uint8)
+    n = len(arr)
+
+    header_cut = _safe_cuts(arr, [0])
+    if not header_cut or header_cut[0] >= n:
+        uploaded_file.seek(0)
+        return pd.read_csv(uploaded_file)
+    start = header_cut[0]
+    targets = [start + (n - start) * i // workers for i in range(1, workers)]
+    bounds = [start] + [c for c in _safe_cuts(arr, targets) if c < n] + [n]
+    bounds = sorted(set(bounds))
+    pieces = [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1)]
+
+    def report(parsed: int) -> None:
+        if progress is not None:
+            progress(min(parsed / n, 1.0))
+
+    if len(pieces) == 1 or workers == 1:
+        frames = []
+        for a, b in pieces:
+            frames.append(_split_columns(_parse_csv_piece(raw[a:b], names, dtypes)))
+            report(b)
+    else:
+        executor = ProcessPoolExecutor if pool == "process" else ThreadPoolExecutor
+        with executor(max_workers=min(workers, len(pieces))) as ex:
+            # processes need picklable bytes; threads can share the buffer
+            futures = [
+                ex.submit(_parse_csv_piece, bytes(raw[a:b]) if pool == "process" else raw[a:b], names, dtypes)
+                for a, b in pieces
+            ]
+            parsed = start
+            for f in as_completed(futures):
+                a, b = pieces[futures.index(f)]
+                parsed += b - a
+                report(parsed)
+        # split once every piece is parsed (the pool has shut down), so the copies never overlap the parsers'
+        # buffers; each future holds its frame until dropped
+        frames = []
+        for i in range(len(futures)):
+            frames.append(_split_columns(futures[i].result()))
+            futures[i] = None
+
+    if len(frames) == 1:
+        return pd.DataFrame(frames[0], copy=False)
+    mixed = _mixed_kind_columns(frames)
+    df = _concat_columns(frames)
+    if mixed:
+        text = {c: str for c in mixed}
+        fixed = pd.concat([_parse_csv_piece(raw[a:b], names, text, usecols=mixed) for a, b in pieces], ignore_index=True)
+        for col in mixed:
+            df[col] = fixed[col].to_numpy()
+    return df
+
+
+class ExcelWorkbook:
+    """
+    An Excel upload opened once. Sheet names and dimensions come from the workbook
+    index without reading cell data; sheets are parsed lazily on first access through
+    pandas' read-only reader and kept, so switching back to a sheet is free.
+    """
+
+    def __init__(self, uploaded_file):
+        self._xls = pd.ExcelFile(uploaded_file)
+        self._frames: Dict[str, pd.DataFrame] = {}
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._xls.sheet_names)
+
+    def dimensions(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Used range per sheet, including the header row (None if the file does not record it)."""
+        book = self._xls.book
+        out: Dict[str, Dict[str, Optional[int]]] = {}
+        for name in self.sheet_names:
+            if hasattr(book, "sheet_by_name"):  # xlrd (.xls)
+                sh = book.sheet_by_name(name)
+                out[name] = {"rows": int(sh.nrows), "cols": int(sh.ncols)}
+            else:  # openpyxl read-only worksheet
+                ws = book[name]
+                out[name] = {"rows": ws.max_row, "cols": ws.max_column}
+        return out
+
+    def sheet(self, name: Optional[str] = None) -> pd.DataFrame:
+        name = name or self.sheet_names[0]
+        if name not in self._frames:
+            self._frames[name] = self._xls.parse(sheet_name=name)
+        return self._frames[name]
+
+    def loaded_sheets(self) -> List[str]:
+        return list(self._frames.keys())
+
+    def close(self) -> None:
+        self._xls.close()
+        self._frames.clear()
+
+
+def _load_uncached(
+    uploaded_file,
+    sheet_name: Optional[str],
+    chunk_rows: Optional[int],
+    progress: Optional[ProgressFn],
+    workbook: Optional[ExcelWorkbook],
+    workers: Optional[int],
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
     name = uploaded_file.name.lower()
 
     if name.endswith(".csv"):
-        df = pd.read_csv(uploaded_file)
-        meta = {"file_type": "csv", "sheet": None}
+        size = _file_size(uploaded_file)
+        streamed = chunk_rows is not None or (size is not None and size > STREAM_THRESHOLD_BYTES)
+        meta = {"file_type": "csv", "sheet": None, "streamed": False}
+        if workers is not None and workers > 1:
+            df = load_csv_parallel(uploaded_file, workers=workers, progress=progress)
+            meta["workers"] = workers
+        elif streamed:
+            df = load_csv_chunked(uploaded_file, chunk_rows=chunk_rows or DEFAULT_CHUNK_ROWS, progress=progress)
+            meta["streamed"] = True
+        else:
+            df = pd.read_csv(uploaded_file)
         return df, meta
 
     if name.endswith(".xlsx") or name.endswith(".xls"):
-        xls = pd.ExcelFile(uploaded_file)
-        chosen = sheet_name or xls.sheet_names[0]
-        df = pd.read_excel(uploaded_file, sheet_name=chosen)
-        meta = {"file_type": "excel", "sheet": chosen, "sheets": xls.sheet_names}
+        book = workbook or ExcelWorkbook(uploaded_file)
+        chosen = sheet_name or book.sheet_names[0]
+        df = book.sheet(chosen)
+        meta = {"file_type": "excel", "sheet": chosen, "sheets": book.sheet_names}
         return df, meta
 
-    raise ValueError("Unsupported file type. Please upload a CSV or Excel file.")
\ No newline at end of file
+    raise ValueError("Unsupported file type. Please upload a CSV or Excel file.")
+
+
+def load_dataframe(
+    uploaded_file,
+    sheet_name: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    progress: Optional[ProgressFn] = None,
+    cache: Optional[DatasetCache] = None,
+    workbook: Optional[ExcelWorkbook] = None,
+    workers: Optional[int] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Load CSV/XLSX to DataFrame.
+    Returns (df, meta) where meta includes file type, sheet name, and basic info.
+    CSVs are streamed in chunks when `chunk_rows` is given or the upload is larger
+    than STREAM_THRESHOLD_BYTES; `progress` receives the fraction of bytes read
+    (parsed, for a parallel parse).
+    With a `cache`, frames are looked up by content hash first; meta then reports
+    `cache` ("hit"/"miss"/"uncacheable"). `load_seconds` is always reported.
+    Pass an already opened `workbook` to switch Excel sheets without re-reading the file.
+    With `workers` > 1, CSVs are parsed in parallel (load_csv_parallel) instead.
+    """
+    t0 = time.perf_counter()
+    key = content_key(uploaded_file, sheet_name) if cache is not None else None
+
+    hit = cache.get(key) if key is not None else None
+    if hit is not None:
+        df, meta = hit
+        meta["cache"] = "hit"
+    else:
+        df, meta = _load_uncached(uploaded_file, sheet_name, chunk_rows, progress, workbook, workers)
+        if key is not None:
+            meta["cache"] = "miss" if cache.put(key, df, meta) else "uncacheable"
+
+    meta["load_seconds"] = float(time.perf_counter() - t0)
+    return df, meta
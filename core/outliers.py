@@ -0,0 +1,174 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.columnar import is_columnar
+from core.executor import get_executor
+
+# default cut-offs: fence multiplier (iqr), |z| (zscore), |modified z| (mad)
+DEFAULT_THRESHOLDS = {"iqr": 1.5, "zscore": 3.0, "mad": 3.5}
+# MAD of a normal distribution is 0.6745 standard deviations (Iglewicz & Hoaglin)
+_MAD_SCALE = 0.6745
+# numeric data materialised per column block
+BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # numpy's 'linear' interpolation, term for term, so results equal Series.quantile
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+
+def batched_quantiles(x: np.ndarray, qs: List[float]) -> np.ndarray:
+    """
+    (len(qs) x n_cols) quantiles of every column of `x`, NaN ignored, from one sort of
+    the whole block (numpy/pandas 'linear' method). All-missing columns give NaN.
+    """
+    xs = np.sort(np.asfortranarray(x), axis=0)  # NaN sorts last
+    n = (~np.isnan(xs)).sum(axis=0)
+    pos = np.asarray(qs, dtype=np.float64)[:, None] * np.maximum(n - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+    out = _lerp(np.take_along_axis(xs, lo, axis=0), np.take_along_axis(xs, hi, axis=0), pos - lo)
+    out[:, n == 0] = np.nan
+    return out
+
+
+def _fences(x: np.ndarray, cols: List[Any], method: str, threshold: float, known: Dict[Any, Tuple[float, float, float]]):
+    """(lower, upper) per column; NaN bounds mean "no outliers" (zero spread or no data)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if method == "zscore":
+            n = (~np.isnan(x)).sum(axis=0)
+            mean = np.nansum(x, axis=0) / n
+            std = np.sqrt(np.nansum((x - mean) ** 2, axis=0) / (n - 1))
+            spread = np.where(std > 0, std, np.nan)
+            return mean - threshold * spread, mean + threshold * spread
+
+        if all(c in known for c in cols):
+            q1, med, q3 = np.array([known[c] for c in cols], dtype=np.float64).T
+        else:
+            q1, med, q3 = batched_quantiles(x, [0.25, 0.5, 0.75])
+        if method == "iqr":
+            iqr = np.where(q3 - q1 > 0, q3 - q1, np.nan)
+            return q1 - threshold * iqr, q3 + threshold * iqr
+
+        mad = batched_quantiles(np.abs(x - med), [0.5])[0]
+        spread = np.where(mad > 0, mad / _MAD_SCALE, np.nan)
+        return med - threshold * spread, med + threshold * spread
+
+
+def _detect_block(frame: pd.DataFrame, method: str, threshold: float, known: Dict[Any, Tuple[float, float, float]]):
+    """Summary and packed row bitmaps for the columns of one block."""
+    cols = frame.columns.tolist()
+    x = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    lower, upper = _fences(x, cols, method, threshold, known)
+    valid = (~np.isnan(x)).sum(axis=0)
+    with np.errstate(invalid="ignore"):
+        flagged = (x < lower) | (x > upper)
+
+    summary: Dict[Any, Optional[Dict[str, Any]]] = {}
+    bitmaps: Dict[Any, np.ndarray] = {}
+    for j, col in enumerate(cols):
+        if valid[j] == 0:
+            summary[col] = None
+            continue
+        if np.isnan(lower[j]):
+            summary[col] = {"outliers": 0, "outlier_pct": 0.0}
+            continue
+        count = int(flagged[:, j].sum())
+        summary[col] = {
+            "outliers": count,
+            "outlier_pct": float(count / valid[j]),
+            "lower": float(lower[j]),
+            "upper": float(upper[j]),
+        }
+        if count:
+            bitmaps[col] = np.packbits(flagged[:, j], bitorder="little")
+    return summary, bitmaps
+
+
+class OutlierFlags:
+    """
+    Row-level result of one outlier run: a packed bitmap (1 bit per row) for every
+    column with outliers. Masks and positions are answered from the bitmaps, so the
+    UI can filter or highlight outlier rows without touching the data again.
+    """
+
+    def __init__(self, n_rows: int, method: str, bitmaps: Dict[Any, np.ndarray]):
+        self.n_rows = int(n_rows)
+        self.method = method
+        self.bitmaps = bitmaps
+
+    @property
+    def columns(self) -> List[Any]:
+        return list(self.bitmaps)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(b.nbytes for b in self.bitmaps.values()))
+
+    def mask(self, cols: Optional[List[Any]] = None) -> np.ndarray:
+        """Rows that are outliers in any of `cols` (default: any column)."""
+        packed = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        for col in (self.columns if cols is None else cols):
+            bits = self.bitmaps.get(col)
+            if bits is not None:
+                packed |= bits
+        return np.unpackbits(packed, count=self.n_rows, bitorder="little").astype(bool)
+
+    def positions(self, cols: Optional[List[Any]] = None) -> np.ndarray:
+        return np.flatnonzero(self.mask(cols))
+
+    def count(self, cols: Optional[List[Any]] = None) -> int:
+        return int(self.mask(cols).sum())
+
+
+def _known_quartiles(df, profile: Optional[Dict[str, Any]], cols: List[Any]) -> Dict[Any, Tuple[float, float, float]]:
+    """Exact profile quartiles, if the profile describes this data."""
+    if not profile or profile.get("approximate") or profile.get("shape", {}).get("rows") != len(df):
+        return {}
+    stats = profile.get("numeric_stats", {})
+    return {c: (stats[c]["p25"], stats[c]["median"], stats[c]["p75"]) for c in cols if c in stats}
+
+
+def detect_outliers(
+    df,
+    cols: Optional[List[str]] = None,
+    method: str = "iqr",
+    threshold: Optional[float] = None,
+    profile: Optional[Dict[str, Any]] = None,
+    workers: Optional[int] = None,
+    return_flags: bool = False,
+):
+    """
+    Outliers of every numeric column by "iqr" (Tukey fences), "zscore" or "mad"
+    (modified z-score), vectorised over column blocks: one sort per block gives all
+    quartiles (skipped when an exact `profile` of the same data already has them).
+    Returns {col: {outliers, outlier_pct, lower, upper}}; return_flags=True also
+    returns the OutlierFlags row bitmaps.
+    """
+    if method not in DEFAULT_THRESHOLDS:
+        raise ValueError(f"Unknown outlier method: {method}")
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else float(threshold)
+
+    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if cols is not None:
+        num_cols = [c for c in cols if c in num_cols]
+    known = _known_quartiles(df, profile, num_cols) if method != "zscore" else {}
+
+    per_block = max(1, BLOCK_BYTES // max(8 * len(df), 1))
+    blocks = [num_cols[i:i + per_block] for i in range(0, len(num_cols), per_block)]
+    if workers and workers > 1 and not is_columnar(df):
+        parts = get_executor(workers).map_blocks(df, blocks, _detect_block, method, threshold, known)
+    else:
+        parts = [_detect_block(df[b], method, threshold, known) for b in blocks]
+
+    summary: Dict[str, Any] = {}
+    bitmaps: Dict[Any, np.ndarray] = {}
+    for found, bits in parts:
+        summary.update({c: out for c, out in found.items() if out is not None})
+        bitmaps.update(bits)
+    if return_flags:
+        return summary, OutlierFlags(len(df), method, bitmaps)
+    return summary
@@ -1,71 +1,378 @@
 from __future__ import annotations
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Optional
 
-def _series_missing_info(s: pd.Series) -> Dict[str, Any]:
-    missing = int(s.isna().sum())
-    total = int(len(s))
+from core.columnar import is_columnar, iter_column_batches, DEFAULT_BATCH_ROWS
+from core.executor import get_executor
+from core.fingerprint import get_fingerprints
+from core.sketches import HyperLogLog, KLLSketch, HeavyHitters, Moments
+
+def _missing_info(missing: int, total: int) -> Dict[str, Any]:
     return {
         "missing": missing,
         "missing_pct": float(missing / total) if total else 0.0,
         "non_null": int(total - missing),
     }
 
-def _top_values(s: pd.Series, k: int = 5) -> List[Dict[str, Any]]:
-    # Convert to string for stable display, keep NaN separate
-    vc = s.dropna().astype(str).value_counts().head(k)
-    return [{"value": idx, "count": int(cnt)} for idx, cnt in vc.items()]
+def _numeric_row(row: pd.Series) -> Dict[str, float]:
+    return {
+        "count": float(row.get("count", np.nan)),
+        "mean": float(row.get("mean", np.nan)),
+        "std": float(row.get("std", np.nan)),
+        "min": float(row.get("min", np.nan)),
+        "p25": float(row.get("25%", np.nan)),
+        "median": float(row.get("50%", np.nan)),
+        "p75": float(row.get("75%", np.nan)),
+        "max": float(row.get("max", np.nan)),
+    }
+
+def _is_categorical_dtype_str(dtype: str) -> bool:
+    return dtype == "object" or "category" in dtype or dtype.startswith("string")
+
+def count_missing(df) -> int:
+    """Total missing cells (DataFrame or ColumnarDataset)."""
+    if is_columnar(df):
+        return int(sum(df.null_counts().values()))
+    return int(df.isna().sum().sum())
+
+def count_duplicates(df, codes: Optional[Dict[Any, np.ndarray]] = None) -> int:
+    """
+    Duplicate rows (DataFrame or ColumnarDataset), same count as df.duplicated().sum().
+    Answered by the dataset's fingerprint index (core.fingerprint), which later duplicate
+    queries on the same dataset reuse; `codes` are per-column factorize codes already
+    computed by the caller.
+    """
+    if len(df) < 2 or df.shape[1] == 0:
+        return 0
+    return get_fingerprints(df, codes=codes).duplicate_count()
+
+_PERCENTILES = np.array([25.0, 50.0, 75.0])
+
+def _profile_numeric(s: pd.Series) -> Tuple[int, Dict[str, float]]:
+    """
+    describe() for one column from a single NaN mask. The arithmetic mirrors pandas'
+    nanops (zero-filled sums, two-pass variance, linear percentiles on the non-null
+    values), so every number is bit-identical to Series.describe.
+    """
+    dtype = s.dtype
+    if not (isinstance(dtype, np.dtype) and (dtype.kind in "iu" or dtype == np.float64)):
+        # extension / float32 columns: let pandas do it
+        desc = s.describe(percentiles=[0.25, 0.5, 0.75])
+        desc = pd.Series(desc.to_numpy(dtype="float64", na_value=np.nan), index=desc.index)
+        return int(s.isna().sum()), _numeric_row(desc)
+
+    v = s.to_numpy()
+    if dtype.kind == "f":
+        mask = np.isnan(v)
+        missing = int(mask.sum())
+        filled = np.where(mask, 0.0, v) if missing else v
+        valid = v[~mask] if missing else v
+        sum_for_mean = filled.sum(dtype=np.float64)
+        as_float = filled
+    else:
+        mask = None
+        missing = 0
+        valid = v
+        sum_for_mean = v.sum(dtype=np.float64)
+        as_float = v.astype("f8")
+
+    count = np.float64(len(v) - missing)
+    stats = {"count": float(count)}
+    if count == 0:
+        stats.update({k: float("nan") for k in ["mean", "std", "min", "p25", "median", "p75", "max"]})
+        return missing, stats
+
+    stats["mean"] = float(sum_for_mean / count)
+    if count <= 1:
+        stats["std"] = float("nan")
+    else:
+        avg = as_float.sum(dtype=np.float64) / count
+        sqr = (avg - as_float) ** 2
+        if missing:
+            np.putmask(sqr, mask, 0)
+        stats["std"] = float(np.sqrt(sqr.sum(dtype=np.float64) / (count - np.float64(1))))
+
+    if missing:
+        q = np.percentile(valid, _PERCENTILES, method="linear")
+    else:
+        q = np.percentile(valid[None, :], _PERCENTILES, axis=1, method="linear")[:, 0]
+    stats["min"] = float(valid.min())
+    stats["p25"], stats["median"], stats["p75"] = (float(x) for x in q)
+    stats["max"] = float(valid.max())
+    # keep describe()'s key order
+    return missing, {k: stats[k] for k in ["count", "mean", "std", "min", "p25", "median", "p75", "max"]}
+
+def _profile_categorical(s: pd.Series, k: int) -> Tuple[int, Dict[str, Any], np.ndarray]:
+    """
+    Missing count, distinct count and top values from one factorize pass.
+    Counts are tallied per raw value and only the distinct values are converted to
+    strings (display keys); keys that collide as strings are merged, then ranked like
+    value_counts (first-appearance order, same sort).
+    """
+    codes, uniques = pd.factorize(s)
+    present = codes[codes >= 0]
+    missing = int(len(codes) - len(present))
+
+    if s.dtype == "object" and pd.api.types.infer_dtype(uniques, skipna=True) != "string":
+        # mixed objects: values that hash equal (1 and 1.0) can still print differently
+        vc = s.dropna().astype(str).value_counts().head(k)
+    else:
+        counts = np.bincount(present, minlength=len(uniques))
+        keys = np.asarray(uniques.astype(str), dtype=object)
+        vc = pd.Series(counts, index=keys)
+        if len(set(keys)) < len(keys):
+            vc = vc.groupby(level=0, sort=False).sum()
+        vc = vc.sort_values(ascending=False).head(k)
+
+    return missing, {
+        "unique": int(len(uniques)),
+        "top_values": [{"value": idx, "count": int(cnt)} for idx, cnt in vc.items()],
+    }, codes
+
+def _profile_numeric_approx(df, col, batch_rows: int, kll_k: int) -> Tuple[int, Dict[str, float]]:
+    moments, kll = Moments(), KLLSketch(k=kll_k)
+    rows = 0
+    for part in iter_column_batches(df, col, batch_rows):
+        v = part.to_numpy(dtype="float64", na_value=np.nan)
+        rows += len(v)
+        moments.update(v)
+        kll.update(v)
+    q = kll.quantiles([0.25, 0.5, 0.75])
+    empty = moments.n == 0
+    return rows - moments.n, {
+        "count": float(moments.n),
+        "mean": float("nan") if empty else float(moments.mean),
+        "std": moments.std(),
+        "min": float("nan") if empty else float(moments.min),
+        "p25": float(q[0]),
+        "median": float(q[1]),
+        "p75": float(q[2]),
+        "max": float("nan") if empty else float(moments.max),
+        "rank_error": kll.rank_error(),
+    }
+
+def _profile_categorical_approx(df, col, k: int, batch_rows: int, hll_p: int, hh_k: int) -> Tuple[int, Dict[str, Any]]:
+    hll, hh = HyperLogLog(p=hll_p), HeavyHitters(k=max(hh_k, k))
+    rows = 0
+    for part in iter_column_batches(df, col, batch_rows):
+        rows += len(part)
+        # one factorize per batch: the sketches only see the distinct values
+        codes, uniques = pd.factorize(part)
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        hll.update(pd.Series(uniques))
+        hh.update_counts(pd.Series(counts, index=uniques))
+    unique = int(round(hll.estimate()))
+    return rows - hh.n, {
+        "unique": unique,
+        "unique_error": int(math.ceil(unique * hll.relative_error())),
+        "top_values": hh.top(k),
+    }
+
+def profile_dataset_approx(
+    df,
+    top_k: int = 5,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    kll_k: int = 200,
+    hll_p: int = 14,
+    heavy_hitters_k: int = 64,
+) -> Dict[str, Any]:
+    """
+    profile_dataset with one-pass sketches over row batches (bounded memory):
+    - count / mean / std / min / max: exact (mergeable moments);
+    - p25 / median / p75: KLL, with `rank_error` (normalized rank, ~99%);
+    - distinct counts: HyperLogLog, with `unique_error` (absolute, ~99%);
+    - top values: Misra-Gries, each with `count_error` (true count is within
+      [count, count + count_error]).
+    Missing counts and duplicate rows are exact. Same keys as profile_dataset plus
+    the error fields and an "approximate" block with the sketch settings.
+    """
+    n_rows, n_cols = df.shape
+    dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
+    num_cols = set(df.select_dtypes(include=[np.number]).columns) if n_rows else set()
+    nulls = df.null_counts() if is_columnar(df) else None
+
+    missing_by_col: Dict[str, Any] = {}
+    numeric_stats: Dict[str, Any] = {}
+    categorical_summary: Dict[str, Any] = {}
+    for col in df.columns:
+        if col in num_cols:
+            missing, numeric_stats[col] = _profile_numeric_approx(df, col, batch_rows, kll_k)
+        elif _is_categorical_dtype_str(dtypes[col]):
+            missing, categorical_summary[col] = _profile_categorical_approx(
+                df, col, top_k, batch_rows, hll_p, heavy_hitters_k
+            )
+        elif nulls is not None:
+            missing = nulls[col]
+        else:
+            missing = int(df[col].isna().sum())
+        missing_by_col[col] = _missing_info(missing, n_rows)
 
-def profile_dataset(df: pd.DataFrame, top_k: int = 5) -> Dict[str, Any]:
+    return {
+        "shape": {"rows": int(n_rows), "cols": int(n_cols)},
+        "dtypes": dtypes,
+        "missing_by_col": missing_by_col,
+        "duplicates": {"duplicate_rows": count_duplicates(df)},
+        "missing_overall": _overall_missing(missing_by_col, n_rows, n_cols),
+        "numeric_stats": numeric_stats,
+        "categorical_summary": categorical_summary,
+        "approximate": {"kll_k": kll_k, "hll_p": hll_p, "heavy_hitters_k": heavy_hitters_k},
+    }
+
+def profile_dataset(
+    df: pd.DataFrame,
+    top_k: int = 5,
+    approximate: bool = False,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
     """
     Return a compact EDA profile dict safe to show/serialize.
+    Each column is visited once: numeric columns get missing count + describe stats
+    from one mask, text/category columns get missing, distinct and top values from one
+    factorize. Works on a ColumnarDataset too (one column in memory at a time).
+    approximate=True profiles an out-of-core ColumnarDataset with profile_dataset_approx
+    (sketches with error bounds, memory bounded by one row batch). In-memory frames are
+    always profiled exactly: the columns are already loaded, and the exact kernels
+    beat sketching them batch by batch. With `workers` > 1, numeric columns of an in-memory frame are profiled on the
+    shared-memory process pool (core.executor); results are the same.
     """
+    if approximate and is_columnar(df):
+        return profile_dataset_approx(df, top_k=top_k)
     n_rows, n_cols = df.shape
 
     dtypes = {col: str(dtype) for col, dtype in df.dtypes.items()}
-    missing_by_col = {col: _series_missing_info(df[col]) for col in df.columns}
-
-    duplicate_rows = int(df.duplicated().sum())
-
-    # Numeric stats
-    num_df = df.select_dtypes(include=[np.number])
-    numeric_stats = {}
-    if not num_df.empty:
-        desc = num_df.describe(percentiles=[0.25, 0.5, 0.75]).transpose()
-        for col, row in desc.iterrows():
-            numeric_stats[col] = {
-                "count": float(row.get("count", np.nan)),
-                "mean": float(row.get("mean", np.nan)),
-                "std": float(row.get("std", np.nan)),
-                "min": float(row.get("min", np.nan)),
-                "p25": float(row.get("25%", np.nan)),
-                "median": float(row.get("50%", np.nan)),
-                "p75": float(row.get("75%", np.nan)),
-                "max": float(row.get("max", np.nan)),
-            }
-
-    # Categorical summary
-    cat_cols = [c for c in df.columns if dtypes[c] == "object" or "category" in dtypes[c]]
-    categorical_summary = {}
-    for col in cat_cols:
-        s = df[col]
-        categorical_summary[col] = {
-            "unique": int(s.nunique(dropna=True)),
-            "top_values": _top_values(s, k=top_k),
-        }
+    # describe() is skipped entirely for a frame without rows
+    num_cols = set(df.select_dtypes(include=[np.number]).columns) if n_rows else set()
+    # out-of-core: Arrow already knows the null counts of columns we don't otherwise load
+    nulls = df.null_counts() if is_columnar(df) else None
 
-    # Overall missing
-    total_cells = int(n_rows * n_cols) if n_rows and n_cols else 0
-    total_missing = int(df.isna().sum().sum())
-    overall_missing_pct = float(total_missing / total_cells) if total_cells else 0.0
+    missing_by_col: Dict[str, Any] = {}
+    numeric_stats: Dict[str, Any] = {}
+    categorical_summary: Dict[str, Any] = {}
+    codes: Dict[Any, np.ndarray] = {}
+    parallel: Dict[Any, Tuple[int, Dict[str, float]]] = {}
+    if workers and workers > 1 and not is_columnar(df) and num_cols:
+        parallel = get_executor(workers).map_columns(df, [c for c in df.columns if c in num_cols], _profile_numeric)
+    for col in df.columns:
+        if col in parallel:
+            missing, numeric_stats[col] = parallel[col]
+        else:
+            missing = _profile_column(
+                df, col, col in num_cols, dtypes[col], top_k, nulls, numeric_stats, categorical_summary, codes
+            )
+        missing_by_col[col] = _missing_info(missing, n_rows)
+
+    duplicate_rows = count_duplicates(df, codes=codes)
 
     return {
         "shape": {"rows": int(n_rows), "cols": int(n_cols)},
         "dtypes": dtypes,
         "missing_by_col": missing_by_col,
         "duplicates": {"duplicate_rows": duplicate_rows},
-        "missing_overall": {"total_missing": total_missing, "missing_pct": overall_missing_pct},
+        "missing_overall": _overall_missing(missing_by_col, n_rows, n_cols),
         "numeric_stats": numeric_stats,
         "categorical_summary": categorical_summary,
     }
+
+def _profile_column(
+    df,
+    col,
+    is_numeric: bool,
+    dtype: str,
+    top_k: int,
+    nulls: Optional[Dict[str, int]],
+    numeric_stats: Dict[str, Any],
+    categorical_summary: Dict[str, Any],
+    codes: Dict[Any, np.ndarray],
+) -> int:
+    """Profile one column into the given dicts; returns its missing count."""
+    if is_numeric:
+        missing, numeric_stats[col] = _profile_numeric(df[col])
+    elif _is_categorical_dtype_str(dtype):
+        missing, categorical_summary[col], codes[col] = _profile_categorical(df[col], top_k)
+    elif nulls is not None:
+        missing = nulls[col]
+    else:
+        missing = int(df[col].isna().sum())
+    return missing
+
+def _overall_missing(missing_by_col: Dict[str, Any], n_rows: int, n_cols: int) -> Dict[str, Any]:
+    total_cells = int(n_rows * n_cols) if n_rows and n_cols else 0
+    total_missing = int(sum(info["missing"] for info in missing_by_col.values()))
+    return {
+        "total_missing": total_missing,
+        "missing_pct": float(total_missing / total_cells) if total_cells else 0.0,
+    }
+
+def update_profile(profile: Dict[str, Any], df, change: Optional[Dict[str, Any]], top_k: int = 5) -> Dict[str, Any]:
+    """
+    Patch a profile_dataset() result after a cleaning step instead of re-profiling.
+    `df` is the cleaned data and `change` the description returned by the cleaner
+    with return_change=True. Only columns whose values changed are re-profiled:
+    - fill_missing: the filled columns;
+    - drop_rows: the columns that lost a non-null value (columns that were missing
+      in every dropped row keep their stats, only their counts move).
+    Duplicates are re-counted unless the drop removed them all. Falls back to a full
+    profile when the change is unknown or leaves no rows.
+    """
+    if not change:
+        return profile
+    if profile.get("approximate"):
+        return profile_dataset_approx(df, top_k=top_k, **profile["approximate"])
+    op = change.get("op")
+    n_rows, n_cols = df.shape
+    if op not in ("fill_missing", "drop_rows") or n_rows == 0 or n_cols != profile["shape"]["cols"]:
+        return profile_dataset(df, top_k=top_k)
+
+    if op == "fill_missing":
+        touched = [c for c in change["filled"] if c in profile["missing_by_col"]]
+        missing_by_col = dict(profile["missing_by_col"])
+        if not touched:
+            return profile
+    else:
+        dropped = change.get("missing_dropped")
+        k = int(change.get("rows_dropped", 0))
+        if dropped is None:
+            return profile_dataset(df, top_k=top_k)
+        if k == 0:
+            return profile
+        missing_by_col = {
+            c: _missing_info(int(info["missing"] - dropped.get(c, 0)), n_rows)
+            for c, info in profile["missing_by_col"].items()
+        }
+        touched = [c for c in df.columns if dropped.get(c, 0) < k]
+
+    dtypes = dict(profile["dtypes"])
+    numeric_stats = dict(profile["numeric_stats"])
+    categorical_summary = dict(profile["categorical_summary"])
+    codes: Dict[Any, np.ndarray] = {}
+    nulls = df.null_counts() if is_columnar(df) else None
+    num_cols = set(df.select_dtypes(include=[np.number]).columns)
+    for col in touched:
+        dtype = df.dtypes[col]
+        dtypes[col] = str(dtype)
+        numeric_stats.pop(col, None)
+        categorical_summary.pop(col, None)
+        missing = _profile_column(
+            df, col, col in num_cols, dtypes[col], top_k, nulls,
+            numeric_stats, categorical_summary, codes,
+        )
+        missing_by_col[col] = _missing_info(missing, n_rows)
+
+    if op == "drop_rows" and change.get("duplicates_cleared"):
+        duplicate_rows = 0
+    else:
+        duplicate_rows = count_duplicates(df, codes=codes)
+
+    # keep the original column order of the stats dicts
+    order = list(df.columns)
+    return {
+        "shape": {"rows": int(n_rows), "cols": int(n_cols)},
+        "dtypes": dtypes,
+        "missing_by_col": missing_by_col,
+        "duplicates": {"duplicate_rows": duplicate_rows},
+        "missing_overall": _overall_missing(missing_by_col, n_rows, n_cols),
+        "numeric_stats": {c: numeric_stats[c] for c in order if c in numeric_stats},
+        "categorical_summary": {c: categorical_summary[c] for c in order if c in categorical_summary},
+    }
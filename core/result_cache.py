@@ -0,0 +1,157 @@
+from __future__ import annotations
+import itertools
+import pickle
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Tuple
+
+import pandas as pd
+
+# ---- dataset versions ----
+# Every dataset object gets a version number the first time it is seen; bump_version
+# gives it a new one. Results cached under an old version are never served again.
+
+_COUNTER = itertools.count(1)
+_VERSIONS: Dict[int, Tuple[weakref.ref, int]] = {}
+
+
+def dataset_version(df) -> int:
+    key = id(df)
+    entry = _VERSIONS.get(key)
+    if entry is not None and entry[0]() is df:
+        return entry[1]
+    return bump_version(df)
+
+
+def bump_version(df) -> int:
+    """Mark `df` as changed (cleaning calls this on its result)."""
+    key = id(df)
+    new = next(_COUNTER)
+    fresh = key not in _VERSIONS or _VERSIONS[key][0]() is not df
+    _VERSIONS[key] = (weakref.ref(df), new)
+    if fresh:
+        weakref.finalize(df, _VERSIONS.pop, key, None)
+    return new
+
+
+def dataset_state(df, registry: Dict[int, Tuple[weakref.ref, int, Any]], factory: Callable[[], Any]):
+    """
+    Per-dataset helper object (an index, cached ranks, ...) kept in `registry` until the
+    dataset is collected or its version moves, then rebuilt with `factory()`.
+    """
+    key = id(df)
+    version = dataset_version(df)
+    entry = registry.get(key)
+    if entry is not None and entry[0]() is df:
+        if entry[1] == version:
+            return entry[2]
+    else:
+        weakref.finalize(df, registry.pop, key, None)
+    obj = factory()
+    registry[key] = (weakref.ref(df), version, obj)
+    return obj
+
+
+# ---- result cache ----
+
+# parameters that change how a result is computed, not what it is (a fresh profile
+# only saves recomputing its percentiles, a rollup cube answers from pre-aggregates,
+# a chart builder draws the figure the other parameters describe)
+NEUTRAL_PARAMS = frozenset({"workers", "profile", "cube", "build"})
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_freeze(v) for v in value]
+        return tuple(sorted(items, key=repr)) if isinstance(value, (set, frozenset)) else tuple(items)
+    return value
+
+
+def _sizeof(value) -> int:
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True, index=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True, index=True))
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Memoises core/ computations per (dataset version, function, parameters).
+
+    Shared by all pages of a session; least recently used entries are evicted once
+    the estimated size passes `max_bytes`. Cached values are shared: treat them as
+    read-only.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(df, fn: Callable, params: Dict[str, Any]) -> Tuple:
+        name = f"{fn.__module__}.{fn.__qualname__}"
+        kept = {k: v for k, v in params.items() if k not in NEUTRAL_PARAMS}
+        return (dataset_version(df), name, _freeze(kept))
+
+    def get(self, df, fn: Callable, **params) -> Tuple[bool, Any]:
+        """(found, value) without computing."""
+        k = self.key(df, fn, params)
+        with self._lock:
+            if k in self._entries:
+                self._entries.move_to_end(k)
+                return True, self._entries[k][0]
+        return False, None
+
+    def put(self, df, fn: Callable, value, **params) -> None:
+        """Store a result computed elsewhere (e.g. a profile patched after cleaning)."""
+        k = self.key(df, fn, params)
+        size = _sizeof(value)
+        with self._lock:
+            if k in self._entries:
+                self._bytes -= self._entries.pop(k)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[k] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= dropped
+
+    def call(self, fn: Callable, df, **params):
+        """fn(df, **params), served from the cache when the dataset has not changed."""
+        found, value = self.get(df, fn, **params)
+        if found:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = fn(df, **params)
+        self.put(df, fn, value, **params)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": float(self.hits / total) if total else 0.0,
+            "entries": len(self._entries),
+            "bytes": int(self._bytes),
+            "max_bytes": int(self.max_bytes),
+        }
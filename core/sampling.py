@@ -0,0 +1,109 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Tuple
+
+from core.columnar import is_columnar
+
+# aggregations that grow with the row count (scaled up when computed on a sample)
+ADDITIVE_AGGS = ("sum", "count")
+
+
+def _take(df, positions: np.ndarray) -> pd.DataFrame:
+    if is_columnar(df):
+        return df.take(positions)
+    return df.iloc[positions]
+
+
+def uniform_positions(n_rows: int, n: int, seed: int = 0) -> np.ndarray:
+    """
+    Sorted row positions of a uniform sample without replacement. The row count is
+    always known here, so this draws the same distribution as a reservoir pass
+    without streaming the data.
+    """
+    rng = np.random.default_rng(seed)
+    return np.sort(rng.choice(n_rows, size=n, replace=False))
+
+
+def stratified_positions(keys: pd.Series, n: int, seed: int = 0) -> np.ndarray:
+    """
+    Proportional allocation per distinct key (missing values are their own stratum).
+    Each stratum's share (size * n / rows) is rounded up or down by systematic rounding:
+    one uniform offset over the cumulative shares. The rows drawn per stratum are then
+    proportional in expectation, so the uniform total / sample factor of sample_scale
+    stays unbiased for every stratum. A stratum with a share below one row can get none.
+    """
+    rng = np.random.default_rng(seed)
+    codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+    sizes = np.bincount(codes, minlength=len(uniques))
+    cum = np.concatenate(([0.0], np.cumsum(sizes * (n / len(keys)))))
+    alloc = np.minimum(np.diff(np.floor(cum + rng.random())).astype(np.int64), sizes)
+
+    # random priority per row; keep the `alloc` lowest priorities within each stratum
+    prio = rng.random(len(codes))
+    order = np.lexsort((prio, codes))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(len(codes)) - np.repeat(starts, sizes)
+    keep = order[rank < np.repeat(alloc, sizes)]
+    return np.sort(keep)
+
+
+def sample_dataset(
+    df,
+    n: int,
+    seed: int = 0,
+    stratify_by: Optional[str] = None,
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Reproducible sample of `n` rows (same seed -> same rows) from a DataFrame or
+    ColumnarDataset. Returns (sample_df, info); if the data already fits, the full
+    frame is returned with info["sampled"] == False.
+    """
+    n_rows = len(df)
+    if n >= n_rows:
+        return df, {"sampled": False, "sample_rows": int(n_rows), "total_rows": int(n_rows)}
+
+    if stratify_by:
+        positions = stratified_positions(df[stratify_by], n, seed)
+        method = f"stratified:{stratify_by}"
+    else:
+        positions = uniform_positions(n_rows, n, seed)
+        method = "uniform"
+
+    return _take(df, positions), {
+        "sampled": True,
+        "sample_rows": int(len(positions)),
+        "total_rows": int(n_rows),
+        "method": method,
+        "seed": int(seed),
+    }
+
+
+def sample_scale(info: Optional[Dict[str, Any]]) -> float:
+    """
+    total_rows / sample_rows for a sample (1.0 for exact results): the factor that turns
+    counts and sums over the sample into estimates for the full data. Stratified samples
+    allocate rows in proportion to stratum size (in expectation, see stratified_positions),
+    so the same factor holds for them.
+    """
+    if info and info.get("sampled") and info.get("sample_rows"):
+        return info["total_rows"] / info["sample_rows"]
+    return 1.0
+
+
+def tag_sample(result: Dict[str, Any], info: Optional[Dict[str, Any]], scaled: bool = False) -> Dict[str, Any]:
+    """
+    Mark a computed summary as sample-based (no-op for exact results); scaled=True records
+    that its counts and sums were multiplied by sample_scale(info).
+    """
+    if info and info.get("sampled"):
+        result = dict(result)
+        result["sample"] = {
+            "sample_rows": info["sample_rows"],
+            "total_rows": info["total_rows"],
+            "method": info.get("method"),
+        }
+        if scaled:
+            result["sample"]["scale_factor"] = round(sample_scale(info), 4)
+            result["sample"]["note"] = "Counts and sums are estimates for all total_rows rows (sample values x scale_factor)."
+    return result
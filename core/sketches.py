@@ -0,0 +1,230 @@
+from __future__ import annotations
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Iterable
+
+# Mergeable one-pass summaries for approximate profiling. Every sketch has
+# update(values) for one batch and merge(other) for combining batches computed
+# separately (chunks, workers); each reports the error bound of its answers.
+
+
+def _hash64(values: pd.Series) -> np.ndarray:
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        x[big] >>= np.uint64(shift)
+    return n + (x > 0)
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**p one-byte registers. relative_error() is three
+    standard errors (1.04 / sqrt(2**p) each), i.e. a ~99% bound.
+    """
+
+    def __init__(self, p: int = 14):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        values = values.dropna()
+        if len(values) == 0:
+            return self
+        h = _hash64(values)
+        idx = (h >> np.uint64(64 - self.p)).astype(np.int64)
+        rest = h << np.uint64(self.p)
+        rho = np.minimum(64 - _bit_length(rest) + 1, 64 - self.p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rho)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int64))))
+        zeros = int((self.registers == 0).sum())
+        if est <= 2.5 * m and zeros:
+            # small range: linear counting
+            est = m * math.log(m / zeros)
+        return est
+
+    def relative_error(self) -> float:
+        return 3 * 1.04 / math.sqrt(len(self.registers))
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch: levels of sorted compactors, level h items weigh 2**h and
+    capacities shrink by 2/3 per level below the top. Exact (numpy 'linear'
+    percentiles) until the first compaction; after that rank_error() is the
+    normalized rank error at ~99% confidence (2.296 / k**0.9723, the published
+    KLL fit for a single quantile).
+    """
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self.min = np.inf
+        self.max = -np.inf
+        self.compacted = False
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(8, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # an odd leftover stays on this level
+                keep = level[:1] if len(level) % 2 else level[:0]
+                pairs = level[len(keep):]
+                promoted = pairs[int(self._rng.integers(2))::2]
+                self.levels[h] = keep
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.compacted = True
+            h += 1
+
+    def update(self, values) -> "KLLSketch":
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if len(v) == 0:
+            return self
+        self.n += len(v)
+        self.min = min(self.min, float(v.min()))
+        self.max = max(self.max, float(v.max()))
+        self.levels[0] = np.concatenate([self.levels[0], v])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.compacted = self.compacted or other.compacted
+        self._compress()
+        return self
+
+    def quantiles(self, qs: Iterable[float]) -> np.ndarray:
+        qs = np.asarray(list(qs), dtype=float)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        if not self.compacted:
+            return np.percentile(self.levels[0], qs * 100, method="linear")
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(l), 2 ** h, dtype=np.int64) for h, l in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum = items[order], np.cumsum(weights[order])
+        pos = np.searchsorted(cum, qs * cum[-1], side="left")
+        out = items[np.minimum(pos, len(items) - 1)]
+        # the extremes are tracked exactly
+        out[qs <= 0] = self.min
+        out[qs >= 1] = self.max
+        return out
+
+    def rank_error(self) -> float:
+        return 2.296 / self.k ** 0.9723 if self.compacted else 0.0
+
+
+class HeavyHitters:
+    """
+    Misra-Gries frequent items with at most k counters (merge rule of Agarwal et al.).
+    Estimated counts never exceed the true ones and undercount by at most `error`,
+    which stays below n / (k + 1).
+    """
+
+    def __init__(self, k: int = 64):
+        self.k = k
+        self.n = 0
+        self.error = 0
+        self.counts = pd.Series(dtype="int64")
+
+    def _add(self, counts: pd.Series, n: int, error: int) -> "HeavyHitters":
+        self.n += int(n)
+        self.error += int(error)
+        merged = self.counts.add(counts, fill_value=0).astype("int64") if len(self.counts) else counts.astype("int64")
+        if len(merged) > self.k:
+            cut = int(merged.nlargest(self.k + 1).iloc[-1])
+            merged = merged - cut
+            merged = merged[merged > 0]
+            self.error += cut
+        self.counts = merged
+        return self
+
+    def update(self, values: pd.Series) -> "HeavyHitters":
+        """Counts are keyed by the string form of the values (as in the profile)."""
+        vc = values.value_counts(sort=False)
+        return self.update_counts(vc[vc > 0])  # drop unused categories
+
+    def update_counts(self, counts: pd.Series) -> "HeavyHitters":
+        """Add a batch already tallied as value -> count."""
+        counts = counts.copy()
+        counts.index = counts.index.astype(str)
+        counts = counts.groupby(level=0, sort=False).sum()
+        return self._add(counts, int(counts.sum()), 0)
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        return self._add(other.counts, other.n, other.error)
+
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        vc = self.counts.sort_values(ascending=False, kind="stable").head(n)
+        return [{"value": idx, "count": int(cnt), "count_error": int(self.error)} for idx, cnt in vc.items()]
+
+
+class Moments:
+    """Exact count / mean / variance / min / max, merged with Chan's parallel update."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _add(self, n: int, mean: float, m2: float, lo: float, hi: float) -> "Moments":
+        if n == 0:
+            return self
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, lo)
+        self.max = max(self.max, hi)
+        return self
+
+    def update(self, values) -> "Moments":
+        v = np.asarray(values, dtype=float)
+        v = v[~np.isnan(v)]
+        if len(v) == 0:
+            return self
+        mean = float(v.mean())
+        return self._add(len(v), mean, float(((v - mean) ** 2).sum()), float(v.min()), float(v.max()))
+
+    def merge(self, other: "Moments") -> "Moments":
+        return self._add(other.n, other.mean, other.m2, other.min, other.max)
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else float("nan")
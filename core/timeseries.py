@@ -0,0 +1,170 @@
+from __future__ import annotations
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Tuple
+
+from core.result_cache import dataset_state
+from core.sampling import ADDITIVE_AGGS
+
+AGGS = ("sum", "mean", "count", "min", "max")
+# partials kept per period; every AGGS entry derives from them (mean = sum / count)
+PARTIALS = ("sum", "count", "min", "max")
+# frequencies answered from a rollup pyramid whose finest level is daily
+PYRAMID_FREQS = ("D", "W", "M", "Q")
+# pyramids kept per dataset version (least recently used dropped first)
+MAX_PYRAMIDS = 8
+# resampled series longer than this are plotted through LTTB (about 2 points per pixel)
+LINE_MAX_POINTS = 2000
+
+
+class _ParsedDates:
+    """
+    Date columns of one dataset version, each parsed once: the valid datetimes in
+    time order and the row of each, so every resample runs on a sorted index.
+    """
+
+    def __init__(self, df):
+        self._df = weakref.ref(df)
+        self.columns: Dict[Any, Tuple[pd.DatetimeIndex, np.ndarray]] = {}
+
+    def get(self, col) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+        parsed = self.columns.get(col)
+        if parsed is None:
+            dates = pd.DatetimeIndex(pd.to_datetime(self._df()[col], errors="coerce"))
+            rows = np.flatnonzero(~dates.isna())
+            order = np.argsort(dates[rows].asi8, kind="stable")
+            parsed = self.columns[col] = (dates[rows[order]], rows[order])
+        return parsed
+
+
+_INDEXES: Dict[int, Tuple[weakref.ref, int, _ParsedDates]] = {}
+
+
+def parsed_dates(df, col) -> Tuple[pd.DatetimeIndex, np.ndarray]:
+    """(sorted valid datetimes of `col`, their rows), shared by every resample of this dataset version."""
+    return dataset_state(df, _INDEXES, lambda: _ParsedDates(df)).get(col)
+
+
+def resample_series(df, date_col, value_col, freq: str = "M", agg: str = "sum") -> pd.Series:
+    """`agg` of `value_col` per `freq` period of `date_col`."""
+    if agg not in AGGS:
+        raise ValueError(f"agg must be one of: {', '.join(AGGS)}")
+    dates, rows = parsed_dates(df, date_col)
+    if not len(rows):
+        raise ValueError("No valid datetime values found.")
+    s = pd.Series(df[value_col].array[rows], index=dates)
+    return s.resample(freq).agg(agg)
+
+
+class TimeRollup:
+    """
+    Rollup pyramid of one (date column, value column) pair: sum/count/min/max per day
+    from one pass over the rows, and every coarser frequency derived from the daily
+    partials (sum of sums, min of mins, ...) on first use. Switching frequency or
+    aggregation then never touches the raw rows again.
+    """
+
+    def __init__(self, df, date_col, value_col):
+        self.date_col = date_col
+        self.value_col = value_col
+        dates, rows = parsed_dates(df, date_col)
+        if not len(rows):
+            raise ValueError("No valid datetime values found.")
+        s = pd.Series(df[value_col].array[rows], index=dates)
+        self.levels: Dict[str, pd.DataFrame] = {"D": s.resample("D").agg(list(PARTIALS))}
+
+    def level(self, freq: str) -> pd.DataFrame:
+        lvl = self.levels.get(freq)
+        if lvl is None:
+            how = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+            lvl = self.levels[freq] = self.levels["D"].resample(freq).agg(how)
+        return lvl
+
+    def series(self, freq: str, agg: str) -> pd.Series:
+        lvl = self.level(freq)
+        if agg == "mean":
+            count = lvl["count"]
+            out = lvl["sum"] / count.where(count > 0)
+        else:
+            out = lvl[agg]
+        return out.rename(None)
+
+
+_PYRAMIDS: Dict[int, Tuple[weakref.ref, int, "OrderedDict[Tuple, TimeRollup]"]] = {}
+
+
+def get_time_rollup(df, date_col, value_col) -> TimeRollup:
+    """The rollup pyramid of this dataset version for (date_col, value_col), built on first use."""
+    pyramids = dataset_state(df, _PYRAMIDS, OrderedDict)
+    key = (date_col, value_col)
+    rollup = pyramids.get(key)
+    if rollup is None:
+        rollup = pyramids[key] = TimeRollup(df, date_col, value_col)
+        while len(pyramids) > MAX_PYRAMIDS:
+            pyramids.popitem(last=False)
+    pyramids.move_to_end(key)
+    return rollup
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Positions of `n_out` points chosen by Largest-Triangle-Three-Buckets (Steinarsson,
+    2013): first and last point kept, then per bucket the point spanning the largest
+    triangle with the previous pick and the next bucket's mean, so peaks and troughs
+    survive the downsampling.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nhi = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[hi:nhi].mean(), y[hi:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = out[i + 1] = lo + int(np.argmax(area))
+    return out
+
+
+def timeseries(df, date_col, value_col, freq: str = "M", agg: str = "sum", max_points: int = LINE_MAX_POINTS) -> Dict[str, Any]:
+    """
+    The resampled series (from the rollup pyramid for D/W/M/Q) that fig_line_timeseries
+    draws and summarize_timeseries reports, plus the points to plot: the series itself, or its
+    LTTB downsample when it has more than `max_points` values.
+    """
+    if freq in PYRAMID_FREQS and agg in AGGS:
+        ts = get_time_rollup(df, date_col, value_col).series(freq, agg)
+    else:
+        ts = resample_series(df, date_col, value_col, freq=freq, agg=agg)
+    plot = ts
+    if len(ts) > max_points:
+        # LTTB needs values at every point; empty periods (NaN means) are skipped
+        valid = ts.dropna()
+        keep = lttb(valid.index.asi8, valid.to_numpy(dtype=np.float64), max_points)
+        plot = valid.iloc[keep]
+    return {
+        "date_col": date_col,
+        "value_col": value_col,
+        "freq": freq,
+        "agg": agg,
+        "series": ts,
+        "plot": plot,
+        "downsampled": len(plot) < len(ts),
+    }
+
+
+def scale_timeseries(ts: Dict[str, Any], scale: float) -> Dict[str, Any]:
+    """
+    A timeseries() result with sum/count periods multiplied by `scale` (core.sampling.sample_scale),
+    so a sampled series reads as full-data estimates; other aggregations and scale 1 are returned as is.
+    """
+    if scale == 1 or ts["agg"] not in ADDITIVE_AGGS:
+        return ts
+    return {**ts, "series": ts["series"] * scale, "plot": ts["plot"] * scale, "scale": scale}
@@ -1,26 +1,46 @@
 from __future__ import annotations
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from typing import Optional
+from matplotlib.colors import LogNorm
+from typing import Dict, Any, Optional
 
-def fig_hist(df: pd.DataFrame, col: str, bins: int = 30):
-    s = df[col].dropna()
-    fig, ax = plt.subplots()
-    ax.hist(s, bins=bins)
+from core.figures import new_figure
+from core.histogram import DENSITY_GRID, density_grid, histogram
+from core.timeseries import timeseries
+
+# scatters with more valid pairs than this are drawn as a density raster
+SCATTER_MAX_POINTS = 100_000
+
+def fig_hist(df: pd.DataFrame, col: str, bins: int = 30, hist: Optional[Dict[str, Any]] = None, scale: float = 1.0):
+    """
+    Drawn from precomputed bin counts (core.histogram), never from the raw values;
+    scale != 1 (a sampled frame) draws the counts as full-data estimates.
+    """
+    hist = hist if hist is not None else histogram(df, col, bins=bins)
+    edges, counts = hist["edges"], hist["counts"]
+    fig, ax = new_figure()
+    ax.hist(edges[:-1], bins=edges, weights=counts * scale)
     ax.set_title(f"Histogram: {col}")
     ax.set_xlabel(col)
-    ax.set_ylabel("Count")
+    ax.set_ylabel("Count" if scale == 1 else "Estimated count")
     return fig
 
-def fig_bar_topk(df: pd.DataFrame, col: str, k: int = 20):
-    s = df[col].dropna().astype(str)
-    vc = s.value_counts().head(k)
-    fig, ax = plt.subplots()
-    ax.bar(vc.index, vc.values)
+def top_value_counts(df, col: str, cube=None) -> pd.Series:
+    """value_counts of the column's values as strings, from a RollupCube over `col` when one serves `df`."""
+    counts = cube.value_counts(col) if cube is not None and cube.serves(df) else None
+    if counts is None:
+        return df[col].dropna().astype(str).value_counts()
+    counts.index = counts.index.astype(str)
+    # values that print the same count together, as astype(str) does before counting
+    return counts.groupby(level=0, sort=False).sum().sort_values(ascending=False)
+
+def fig_bar_topk(df: pd.DataFrame, col: str, k: int = 20, cube=None, scale: float = 1.0):
+    vc = top_value_counts(df, col, cube=cube).head(k)
+    fig, ax = new_figure()
+    ax.bar(vc.index, vc.values * scale)
     ax.set_title(f"Top {k} values: {col}")
     ax.set_xlabel(col)
-    ax.set_ylabel("Count")
+    ax.set_ylabel("Count" if scale == 1 else "Estimated count")
     ax.tick_params(axis="x", labelrotation=45)
     fig.tight_layout()
     return fig
@@ -31,56 +51,74 @@ def fig_line_timeseries(
     value_col: str,
     freq: str = "M",
     agg: str = "sum",
+    ts: Optional[Dict[str, Any]] = None,
 ):
     """
     freq: 'D','W','M','Q'...
+    Drawn from a core.timeseries result (LTTB-downsampled for long series).
     """
-    d = df[[date_col, value_col]].copy()
-    d[date_col] = pd.to_datetime(d[date_col], errors="coerce")
-    d = d.dropna(subset=[date_col])
-    if d.empty:
-        raise ValueError("No valid datetime values found.")
-
-    d = d.set_index(date_col)
-    if agg == "sum":
-        ts = d[value_col].resample(freq).sum()
-    elif agg == "mean":
-        ts = d[value_col].resample(freq).mean()
-    elif agg == "count":
-        ts = d[value_col].resample(freq).count()
-    else:
-        raise ValueError("agg must be one of: sum, mean, count")
+    ts = ts if ts is not None else timeseries(df, date_col, value_col, freq=freq, agg=agg)
+    line = ts["plot"]
 
-    fig, ax = plt.subplots()
-    ax.plot(ts.index, ts.values)
-    ax.set_title(f"{agg}({value_col}) over time ({freq})")
+    fig, ax = new_figure()
+    ax.plot(line.index, line.values)
+    title = f"{agg}({value_col}) over time ({freq})"
+    if ts["downsampled"]:
+        title += f", {len(line):,} of {len(ts['series']):,} points"
+    if ts.get("scale", 1.0) != 1:
+        title += ", estimated from sample"
+    ax.set_title(title)
     ax.set_xlabel("Time")
     ax.set_ylabel(value_col)
     fig.tight_layout()
     return fig
 
-def fig_scatter(df: pd.DataFrame, x: str, y: str):
-    d = df[[x, y]].dropna()
-    fig, ax = plt.subplots()
-    ax.scatter(d[x], d[y])
-    ax.set_title(f"Scatter: {x} vs {y}")
+def fig_scatter(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    max_points: int = SCATTER_MAX_POINTS,
+    density: Optional[Dict[str, Any]] = None,
+):
+    """
+    Point scatter up to `max_points` valid pairs; above that (or when a `density`
+    grid from core.histogram is given) a log-scaled density raster of the same data.
+    """
+    if density is None:
+        d = df[[x, y]].dropna()
+        if len(d) > max_points:
+            density = density_grid(d, x, y, grid=DENSITY_GRID)
+    fig, ax = new_figure()
+    if density is not None and density.get("n_points"):
+        xe, ye = density["x_edges"], density["y_edges"]
+        counts = np.ma.masked_equal(density["counts"].T, 0)
+        im = ax.imshow(
+            counts, origin="lower", aspect="auto", interpolation="nearest",
+            extent=(xe[0], xe[-1], ye[0], ye[-1]), norm=LogNorm(vmin=1, vmax=max(int(counts.max()), 1)),
+        )
+        fig.colorbar(im, ax=ax, label="Points per cell")
+        ax.set_title(f"Scatter density: {x} vs {y} ({density['n_points']:,} points)")
+    else:
+        if density is not None:
+            d = df[[x, y]].dropna()
+        ax.scatter(d[x], d[y])
+        ax.set_title(f"Scatter: {x} vs {y}")
     ax.set_xlabel(x)
     ax.set_ylabel(y)
     fig.tight_layout()
     return fig
 
 def fig_corr_heatmap(df: pd.DataFrame, max_cols: int = 25):
-    num = df.select_dtypes(include=[np.number])
-    if num.shape[1] < 2:
+    num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    if len(num_cols) < 2:
         raise ValueError("Need at least 2 numeric columns for correlation heatmap.")
 
-    # limit columns to keep readable
-    if num.shape[1] > max_cols:
-        num = num.iloc[:, :max_cols]
+    # limit columns to keep readable (and only load those)
+    num = df[num_cols[:max_cols]]
 
     corr = num.corr(numeric_only=True)
 
-    fig, ax = plt.subplots()
+    fig, ax = new_figure()
     im = ax.imshow(corr.values, aspect="auto")
     ax.set_title("Correlation Heatmap")
     ax.set_xticks(range(corr.shape[1]))